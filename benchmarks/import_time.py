@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+"""
+Import time benchmark
+~~~~~~~~~~~~~~~~~~~~~
+
+Measures how long ``import geophotos`` takes in fresh interpreters, and
+checks that none of the heavy dependencies are loaded by the import
+itself. Exits with a non-zero status if either check fails, so that it
+can guard against regressions.
+
+Usage:
+    python benchmarks/import_time.py [--runs 10] [--limit 0.5]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Dependencies that should only be imported once they are needed
+HEAVY_MODULES = ['folium', 'branca', 'pandas', 'requests', 'PIL', 'osgeo',
+                 'fiona', 'geopandas']
+
+# Runs in a fresh interpreter, and prints the import time and the heavy
+# modules that were loaded
+_SCRIPT = '''
+import json, sys, time
+start = time.perf_counter()
+import geophotos
+elapsed = time.perf_counter() - start
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{'elapsed': elapsed, 'heavy': heavy}}))
+'''
+
+
+def measure(runs):
+    '''Imports geophotos in a number of fresh interpreters.
+
+    Args:
+        runs (int):
+            The number of interpreters to import geophotos in.
+
+    Returns:
+        A tuple of the import time of each run in seconds, and the heavy
+        modules that were loaded by any of the runs.
+    '''
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    script = _SCRIPT.format(heavy=HEAVY_MODULES)
+    times, heavy = [], set()
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', script], cwd=root,
+                                capture_output=True, text=True, check=True)
+        result = json.loads(output.stdout)
+        times.append(result['elapsed'])
+        heavy.update(result['heavy'])
+    return times, sorted(heavy)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--runs', type=int, default=10,
+                        help='number of fresh interpreters to import in')
+    parser.add_argument('--limit', type=float, default=0.5,
+                        help='maximum median import time in seconds')
+    args = parser.parse_args()
+
+    times, heavy = measure(args.runs)
+    median = statistics.median(times)
+    print(json.dumps({'median': median, 'min': min(times),
+                      'max': max(times), 'heavy_modules': heavy}, indent=4))
+
+    failed = False
+    if heavy:
+        print(f'Heavy modules were imported eagerly: {", ".join(heavy)}',
+              file=sys.stderr)
+        failed = True
+    if median > args.limit:
+        print(f'Median import time of {median:.3f}s exceeds the limit of '
+              f'{args.limit:.3f}s', file=sys.stderr)
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+
+"""
+Pipeline benchmarks
+~~~~~~~~~~~~~~~~~~~
+
+Times each stage of the extraction, geocoding and rendering pipeline on
+synthetic data of several sizes, and records the throughput and peak
+memory of each. The results are written as JSON, so that runs can be
+compared across commits.
+
+Usage:
+    python benchmarks/pipeline.py [--sizes 1000 10000] [--output FILE]
+                                  [--compare PREVIOUS_FILE]
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import geophotos as gp
+from geophotos.data import _parse_google_takeout_json
+from geophotos.track import simplify_track
+
+import synthetic
+
+
+def measure(function, repeat):
+    '''Times a function, then runs it once more to measure its peak
+    memory use, since tracing allocations slows it down.
+
+    Args:
+        function (callable):
+            The function to measure, which takes no arguments.
+        repeat (int):
+            The number of timed runs, of which the fastest is kept.
+
+    Returns:
+        A tuple of the fastest time in seconds and the peak number of
+        bytes allocated.
+    '''
+
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(times), peak
+
+
+def benchmarks(directory, size, max_images, max_exact, shapefile):
+    '''Creates the data of a given size and the benchmarks that use it.
+
+    Returns:
+        A list of (name, number of items, function) tuples.
+    '''
+
+    takeout = os.path.join(directory, f'takeout_{size}.json')
+    synthetic.make_takeout_json(takeout, size)
+    table = os.path.join(directory, f'coordinates_{size}.csv')
+    synthetic.make_csv(table, size)
+    coordinates = gp.coordinates_from_csv(table, 2, 3, columnar=True)
+    track = gp.CoordinateArray(*synthetic.random_track(size))
+    html = os.path.join(directory, 'heatmap.html')
+
+    # Images and exact lookups are much slower, so they use fewer items
+    images = min(size, max_images)
+    folder = os.path.join(directory, f'images_{images}')
+    if not os.path.isdir(folder):
+        synthetic.make_jpegs(folder, images)
+    photos = gp.GeoPhotos(sorted(os.path.join(folder, name)
+                                 for name in os.listdir(folder)))
+    exact = coordinates[:min(size, max_exact)]
+    try:
+        locator = gp.ReverseGeolocator(shapefile)
+        cached = gp.ReverseGeolocator(shapefile, cache_size=len(exact))
+    except (ImportError, OSError) as error:
+        # Without OGR or the world borders nothing can be geocoded
+        print(f'Skipping the geocoding benchmarks: {error}', file=sys.stderr)
+        locator = None
+
+    def pull_coordinates():
+        photos.pull_coordinates(metadata=photos.pull_metadata(fast=True))
+
+    def get_country_cached():
+        # Start from an empty cache, so that nearly every lookup is a
+        # miss, which is the worst case for the cache
+        cached.cache_clear()
+        return [cached.get_country(point) for point in exact]
+
+    def render():
+        heatmap = gp.Map(location=[43.05, -76.15], zoom_start=6)
+        heatmap.coordinates = coordinates
+        heatmap.create_heatmap(max_points=50000)
+        heatmap.save_html(html)
+
+    cases = [
+        ('find_images', images, lambda: photos.find(folder)),
+        ('pull_coordinates', images, pull_coordinates),
+        ('parse_takeout_json', size,
+         lambda: _parse_google_takeout_json(takeout)),
+        ('parse_takeout_json_columnar', size,
+         lambda: _parse_google_takeout_json(takeout, columnar=True)),
+        ('coordinates_from_csv', size,
+         lambda: gp.coordinates_from_csv(table, 2, 3, columnar=True)),
+        ('simplify_track', size, lambda: simplify_track(track)),
+        ('map_heatmap_save_html', size, render),
+    ]
+    if locator is not None:
+        cases += [
+            ('reverse_geolocator_get_country', len(exact),
+             lambda: [locator.get_country(point) for point in exact]),
+            ('reverse_geolocator_get_country_cached', len(exact),
+             get_country_cached),
+            ('reverse_geolocator_get_countries', len(exact),
+             lambda: locator.get_countries(exact.latitudes,
+                                           exact.longitudes)),
+            ('analyzer', size, lambda: gp.Analyzer(coordinates)),
+            ('analyzer_grid', size,
+             lambda: gp.Analyzer(coordinates, resolution=0.1)),
+        ]
+    return cases
+
+
+def environment():
+    '''Describes the machine and the commit that the benchmarks ran on.'''
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'date': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+    }
+
+
+def compare(results, previous):
+    '''Prints how much faster or slower each benchmark got compared to a
+    previous run.'''
+
+    before = {(result['benchmark'], result['size']): result
+              for result in previous['results']}
+    for result in results:
+        old = before.get((result['benchmark'], result['size']))
+        if old is None:
+            continue
+        ratio = old['seconds'] / result['seconds']
+        print(f'{result["benchmark"]:>32} {result["size"]:>9}: '
+              f'{ratio:6.2f}x speed, '
+              f'{result["peak_bytes"] / max(old["peak_bytes"], 1):6.2f}x '
+              f'memory')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[1000, 10000, 100000],
+                        help='numbers of coordinates to benchmark with')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='number of timed runs of each benchmark')
+    parser.add_argument('--max-images', type=int, default=2000,
+                        help='largest number of images to create')
+    parser.add_argument('--max-exact', type=int, default=20000,
+                        help='largest number of single point lookups')
+    parser.add_argument('--shapefile',
+                        default=gp.WORLD_BORDERS,
+                        help='shapefile of world borders')
+    parser.add_argument('--only', nargs='+',
+                        help='names of the benchmarks to run')
+    parser.add_argument('--output', default='benchmark_results.json',
+                        help='where to write the results')
+    parser.add_argument('--compare',
+                        help='results of a previous run to compare with')
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            cases = benchmarks(directory, size, args.max_images,
+                               args.max_exact, args.shapefile)
+            for name, items, function in cases:
+                if args.only and name not in args.only:
+                    continue
+                seconds, peak = measure(function, args.repeat)
+                result = {'benchmark': name, 'size': items,
+                          'seconds': seconds,
+                          'throughput': items / seconds if seconds else None,
+                          'peak_bytes': peak}
+                results.append(result)
+                print(f'{name:>32} {items:>9}: {seconds:9.4f}s '
+                      f'{result["throughput"] or 0:14.1f}/s '
+                      f'{peak / 2**20:9.1f} MiB', flush=True)
+
+    with open(args.output, 'w') as output:
+        json.dump({'environment': environment(), 'results': results},
+                  output, indent=4)
+    if args.compare:
+        with open(args.compare) as previous:
+            compare(results, json.load(previous))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+
+"""
+Synthetic data generators
+~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Creates reproducible datasets of any size for the benchmarks: JPEG
+images with GPS exif data, Google Takeout Location History JSON files,
+coordinate csv files and simulated location tracks. Every generator
+takes a seed, so the same arguments always produce the same data.
+"""
+
+import csv
+import json
+import os
+
+import numpy as np
+
+# Centers and spreads in degrees of the clusters that coordinates are
+# drawn around, so that the data resembles real travel histories
+_CLUSTERS = np.array([
+    (43.05, -76.15, 0.5),
+    (40.71, -74.01, 0.3),
+    (48.86, 2.35, 0.4),
+    (35.68, 139.69, 0.6),
+    (-33.87, 151.21, 0.5),
+])
+
+# Start of the synthetic timestamps, in milliseconds since the epoch
+_START_MS = 1_500_000_000_000
+
+
+def random_coordinates(size, seed=0):
+    '''Draws coordinates around a handful of cities, with some spread
+    uniformly over the world.
+
+    Args:
+        size (int):
+            The number of coordinates.
+
+    Kwargs:
+        seed (int) --> 0:
+            Seed of the random number generator.
+
+    Returns:
+        A tuple of a latitude array, a longitude array and an int64
+        array of increasing millisecond timestamps.
+    '''
+
+    rng = np.random.default_rng(seed)
+    clusters = _CLUSTERS[rng.integers(len(_CLUSTERS), size=size)]
+    latitudes = rng.normal(clusters[:, 0], clusters[:, 2])
+    longitudes = rng.normal(clusters[:, 1], clusters[:, 2])
+    # A tenth of the points are anywhere in the world
+    scattered = rng.random(size) < 0.1
+    latitudes[scattered] = rng.uniform(-60, 70, scattered.sum())
+    longitudes[scattered] = rng.uniform(-180, 180, scattered.sum())
+    steps = rng.integers(1_000, 600_000, size=size)
+    timestamps = _START_MS + np.cumsum(steps)
+    return (np.clip(latitudes, -89.9, 89.9),
+            np.clip(longitudes, -179.9, 179.9), timestamps)
+
+
+def random_track(size, seed=0):
+    '''Simulates a location history that alternates between staying
+    at a place and travelling to the next one along a winding route,
+    with a point every few seconds and some GPS noise.
+
+    Args:
+        size (int):
+            The number of points.
+
+    Kwargs:
+        seed (int) --> 0:
+            Seed of the random number generator.
+
+    Returns:
+        A tuple of a latitude array, a longitude array and an int64
+        array of increasing millisecond timestamps.
+    '''
+
+    rng = np.random.default_rng(seed)
+    # Roughly ten meters of noise, in degrees
+    noise = 1e-4
+    place = _CLUSTERS[0, :2].copy()
+    parts, remaining = [], size
+    while remaining > 0:
+        # Stay somewhere for a while
+        count = min(int(rng.integers(100, 1000)), remaining)
+        parts.append(place + rng.normal(0, noise, (count, 2)))
+        remaining -= count
+        # Then travel to the next place through a few turns
+        turns = place + np.cumsum(rng.normal(0, 0.01, (int(rng.integers(2, 8)),
+                                                        2)), axis=0)
+        route = np.vstack([place, turns])
+        count = min(int(rng.integers(100, 1000)), remaining)
+        positions = np.linspace(0, len(route) - 1, count)
+        points = np.column_stack([
+            np.interp(positions, np.arange(len(route)), route[:, axis])
+            for axis in range(2)
+        ])
+        parts.append(points + rng.normal(0, noise / 2, (count, 2)))
+        remaining -= count
+        place = route[-1]
+    points = np.vstack(parts)[:size]
+    steps = rng.integers(2_000, 15_000, size=size)
+    return points[:, 0], points[:, 1], _START_MS + np.cumsum(steps)
+
+
+def _to_rationals(value):
+    '''Converts a coordinate to exif degrees, minutes and seconds.'''
+
+    from PIL.TiffImagePlugin import IFDRational
+
+    value = abs(value)
+    degrees = int(value)
+    minutes = int((value - degrees) * 60)
+    seconds = (value - degrees - minutes / 60) * 3600
+    return (IFDRational(degrees, 1), IFDRational(minutes, 1),
+            IFDRational(round(seconds * 1000), 1000))
+
+
+def make_jpegs(directory, size, seed=0):
+    '''Creates small JPEG images that have a timestamp and GPS exif data.
+
+    Args:
+        directory (str):
+            The directory to save the images in.
+        size (int):
+            The number of images.
+
+    Kwargs:
+        seed (int) --> 0:
+            Seed of the random number generator.
+
+    Returns:
+        A list of the filepaths of the images.
+    '''
+
+    from PIL import Image
+
+    os.makedirs(directory, exist_ok=True)
+    latitudes, longitudes, timestamps = random_coordinates(size, seed)
+    image = Image.new('RGB', (64, 48), (90, 140, 200))
+    filepaths = []
+    for i in range(size):
+        exif = Image.Exif()
+        moment = np.datetime64(int(timestamps[i]), 'ms').astype(object)
+        exif[0x0132] = moment.strftime('%Y:%m:%d %H:%M:%S')
+        exif[0x8825] = {
+            1: 'N' if latitudes[i] >= 0 else 'S',
+            2: _to_rationals(latitudes[i]),
+            3: 'E' if longitudes[i] >= 0 else 'W',
+            4: _to_rationals(longitudes[i]),
+        }
+        filepath = os.path.join(directory, f'image{i:07d}.jpg')
+        image.save(filepath, exif=exif)
+        filepaths.append(filepath)
+    return filepaths
+
+
+def make_takeout_json(filepath, size, seed=0):
+    '''Creates a Google Takeout Location History JSON file.
+
+    Args:
+        filepath (str):
+            Where to save the file.
+        size (int):
+            The number of locations.
+
+    Kwargs:
+        seed (int) --> 0:
+            Seed of the random number generator.
+    '''
+
+    latitudes, longitudes, timestamps = random_coordinates(size, seed)
+    latitudes = np.round(latitudes * 1e7).astype(np.int64).tolist()
+    longitudes = np.round(longitudes * 1e7).astype(np.int64).tolist()
+    with open(filepath, 'w') as output:
+        output.write('{\n  "locations": [')
+        for i, timestamp in enumerate(timestamps.tolist()):
+            location = {'timestampMs': str(timestamp),
+                        'latitudeE7': latitudes[i],
+                        'longitudeE7': longitudes[i],
+                        'accuracy': 20}
+            separator = ',' if i else ''
+            output.write(f'{separator}\n    {json.dumps(location)}')
+        output.write('\n  ]\n}\n')
+
+
+def make_csv(filepath, size, seed=0):
+    '''Creates a csv file with timestamp, latitude and longitude columns,
+    in the same layout as csv_from_google_takeout_json.
+
+    Args:
+        filepath (str):
+            Where to save the file.
+        size (int):
+            The number of rows.
+
+    Kwargs:
+        seed (int) --> 0:
+            Seed of the random number generator.
+    '''
+
+    latitudes, longitudes, timestamps = random_coordinates(size, seed)
+    moments = timestamps.astype('datetime64[ms]').astype('datetime64[s]')
+    with open(filepath, 'w', newline='') as output:
+        writer = csv.writer(output)
+        writer.writerow(['timestamp', 'latitude', 'longitude'])
+        writer.writerows(zip(np.datetime_as_string(moments, unit='s'),
+                             latitudes.tolist(), longitudes.tolist()))
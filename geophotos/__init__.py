@@ -1,3 +1,89 @@
-from .analyze import *
-from .data import *
-from .geophotos import *
\ No newline at end of file
+"""
+GeoPhotos
+~~~~~~~~~
+
+Pull coordinates from photos, analyze them, and plot them on a map.
+
+Submodules are only imported once one of their names is first used, so
+that heavy dependencies such as folium, pandas, PIL and OGR are not
+loaded by ``import geophotos`` itself.
+"""
+
+import importlib
+import importlib.util
+
+# The submodule that defines each public name of the package
+_EXPORTS = {
+    'DEFAULT_RESOLUTION': 'aggregate',
+    'aggregate_coordinates': 'aggregate',
+    'aggregate_pyramid': 'aggregate',
+    'ANALYSIS_VERSION': 'analyze',
+    'Analyzer': 'analyze',
+    'CacheInfo': 'analyze',
+    'Country': 'analyze',
+    'GridGeolocator': 'analyze',
+    'ReverseGeolocator': 'analyze',
+    'WORLD_BORDERS': 'analyze',
+    'clear_countries': 'analyze',
+    'load_countries': 'analyze',
+    'simplify_countries': 'analyze',
+    'MetadataCache': 'cache',
+    'SCHEMA_VERSION': 'cache',
+    'CoordinateArray': 'coordinates',
+    'binary_from_google_takeout_json': 'data',
+    'coordinates_from_csv': 'data',
+    'coordinates_from_google_takeout_json': 'data',
+    'csv_from_google_takeout_json': 'data',
+    'iter_csv_coordinates': 'data',
+    'iter_google_takeout_json': 'data',
+    'read_gps_exif': 'exif',
+    'GeoPhotos': 'geophotos',
+    'Progress': 'geophotos',
+    'print_progress': 'geophotos',
+    'requires_geopandas': 'geophotos',
+    'CountryLayer': 'maps',
+    'Map': 'maps',
+    'IMAGE_EXTENSIONS': 'scan',
+    'iter_images': 'scan',
+    'FORMAT_VERSION': 'storage',
+    'read_coordinates': 'storage',
+    'read_npz': 'storage',
+    'write_coordinates': 'storage',
+    'write_npz': 'storage',
+    'DEFAULT_GRADIENT': 'tiles',
+    'EMPTY_TILE': 'tiles',
+    'TILE_SIZE': 'tiles',
+    'render_heat_tiles': 'tiles',
+    'DEFAULT_STAY_DISTANCE': 'track',
+    'DEFAULT_STAY_DURATION': 'track',
+    'DEFAULT_TOLERANCE': 'track',
+    'Reduction': 'track',
+    'find_stays': 'track',
+    'simplify_path': 'track',
+    'simplify_track': 'track',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    """Imports the submodule that defines a name when it is first used.
+    Submodules themselves, such as geophotos.analyze, are imported the
+    same way."""
+
+    if name not in _EXPORTS:
+        # Importing a submodule also sets it as an attribute of the package
+        if importlib.util.find_spec(f'.{name}', __name__) is not None:
+            return importlib.import_module(f'.{name}', __name__)
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    module = importlib.import_module(f'.{_EXPORTS[name]}', __name__)
+    value = getattr(module, name)
+    # Store the value so that this is only called once per name
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    """Lists the public names alongside the already imported ones."""
+
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+
+"""
+geophotos.aggregate
+~~~~~~~~~~~~~~~~~~~
+
+Reduces large amounts of coordinate data to a manageable number of
+weighted points by binning them into the cells of a latitude/longitude
+grid. Each occupied cell becomes a single [latitude, longitude, weight]
+point, where the weight is the number of coordinates in the cell, so a
+heatmap of the points looks the same as a heatmap of the coordinates.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+# Size in degrees of the grid cells that coordinates are binned into by
+# default, which is roughly a hundred meters
+DEFAULT_RESOLUTION = 0.001
+
+# The occupied cells of a grid, where the latitudes and longitudes are
+# the sums of those of the coordinates in each cell
+_Cells = namedtuple('_Cells',
+                    ['rows', 'columns', 'counts', 'latitudes', 'longitudes'])
+
+
+def _as_columns(coordinates):
+    '''Returns the latitudes and longitudes of coordinate data, leaving
+    out any missing values.
+
+    Args:
+        coordinates (list/CoordinateArray):
+            A list of (latitude, longitude) tuples, an array of them, or
+            a CoordinateArray.
+
+    Returns:
+        A tuple of a latitude array and a longitude array.
+    '''
+
+    coordinates = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+    latitudes, longitudes = coordinates[:, 0], coordinates[:, 1]
+    complete = np.isfinite(latitudes) & np.isfinite(longitudes)
+    if not complete.all():
+        latitudes, longitudes = latitudes[complete], longitudes[complete]
+    return latitudes, longitudes
+
+
+def _merge(rows, columns, counts, latitudes, longitudes):
+    '''Merges the entries that fall in the same cell.
+
+    Returns:
+        The cells, as a _Cells tuple.
+    '''
+
+    keys = rows * 2**32 + columns
+    keys, first, inverse = np.unique(keys, return_index=True,
+                                     return_inverse=True)
+    inverse = inverse.reshape(-1)
+    size = len(keys)
+    return _Cells(
+        rows=rows[first],
+        columns=columns[first],
+        counts=np.bincount(inverse, weights=counts, minlength=size),
+        latitudes=np.bincount(inverse, weights=latitudes, minlength=size),
+        longitudes=np.bincount(inverse, weights=longitudes, minlength=size),
+    )
+
+
+def _bin(latitudes, longitudes, resolution):
+    '''Bins coordinates into the cells of a grid.
+
+    Args:
+        latitudes (numpy.ndarray):
+            The latitudes of the coordinates.
+        longitudes (numpy.ndarray):
+            The longitudes of the coordinates.
+        resolution (float):
+            The size of the grid's cells in degrees.
+
+    Returns:
+        The occupied cells, as a _Cells tuple.
+    '''
+
+    if resolution <= 0:
+        raise ValueError('The resolution must be positive.')
+    rows = np.floor((latitudes + 90) / resolution).astype(np.int64)
+    columns = np.floor((longitudes + 180) / resolution).astype(np.int64)
+    return _merge(rows, columns, np.ones(len(latitudes)),
+                  latitudes, longitudes)
+
+
+def _coarsen(cells):
+    '''Merges every two by two block of cells of a grid into one cell,
+    which doubles the size of the cells. Only the occupied cells are
+    processed, rather than the original coordinates.
+
+    Returns:
+        The occupied cells of the coarser grid, as a _Cells tuple.
+    '''
+
+    return _merge(cells.rows // 2, cells.columns // 2, cells.counts,
+                  cells.latitudes, cells.longitudes)
+
+
+def _to_points(cells):
+    '''Converts cells to [latitude, longitude, weight] points, placing
+    each point at the mean position of the coordinates in its cell.
+
+    Returns:
+        An array with one row per cell.
+    '''
+
+    return np.column_stack([cells.latitudes / cells.counts,
+                            cells.longitudes / cells.counts,
+                            cells.counts])
+
+
+def aggregate_coordinates(coordinates, resolution=DEFAULT_RESOLUTION,
+                          max_points=None):
+    '''Bins coordinate data into the cells of a grid, turning each
+    occupied cell into a single weighted point.
+
+    Example usage:
+    >>> aggregate_coordinates([(43.1002, -76.2002), (43.1004, -76.2004)])
+    array([[ 43.1003, -76.2003,   2.    ]])
+
+    Args:
+        coordinates (list/CoordinateArray):
+            A list of (latitude, longitude) tuples, an array of them, or
+            a CoordinateArray. Missing values are left out.
+
+    Kwargs:
+        resolution (float) --> DEFAULT_RESOLUTION:
+            The size of the grid's cells in degrees, which bounds how
+            far each coordinate can be moved.
+        max_points (int) --> None:
+            The maximum number of points to return. The size of the
+            cells is doubled for as long as there are more occupied
+            cells than this. A value of None will not limit the number
+            of points.
+
+    Returns:
+        An array with a row of [latitude, longitude, weight] for each
+        occupied cell, where the weight is the number of coordinates in
+        the cell and the position is their mean.
+    '''
+
+    if max_points is not None and max_points < 1:
+        raise ValueError('The maximum number of points must be positive.')
+    cells = _bin(*_as_columns(coordinates), resolution)
+    if max_points is not None:
+        while len(cells.counts) > max_points:
+            cells = _coarsen(cells)
+    return _to_points(cells)
+
+
+def aggregate_pyramid(coordinates, resolution=DEFAULT_RESOLUTION, levels=1,
+                      step=1, max_points=None):
+    '''Bins coordinate data into a series of increasingly coarse grids.
+    Only the finest grid is computed from the coordinates, and each
+    coarser grid is computed from the occupied cells of the one before
+    it.
+
+    Args:
+        coordinates (list/CoordinateArray):
+            A list of (latitude, longitude) tuples, an array of them, or
+            a CoordinateArray. Missing values are left out.
+
+    Kwargs:
+        resolution (float) --> DEFAULT_RESOLUTION:
+            The size of the finest grid's cells in degrees.
+        levels (int) --> 1:
+            The number of grids.
+        step (int) --> 1:
+            The cells of each grid are 2**step times larger than those
+            of the grid before it.
+        max_points (int) --> None:
+            The maximum number of points of each grid. A grid with more
+            occupied cells than this is made coarser, as are the grids
+            after it. A value of None will not limit the number of
+            points.
+
+    Returns:
+        A list with an array of [latitude, longitude, weight] points for
+        each grid, from finest to coarsest. See aggregate_coordinates.
+        Consecutive grids that ended up with the same cells share the
+        same array.
+    '''
+
+    if levels < 1 or step < 1:
+        raise ValueError('The levels and step must be positive.')
+    if max_points is not None and max_points < 1:
+        raise ValueError('The maximum number of points must be positive.')
+    cells = _bin(*_as_columns(coordinates), resolution)
+    # Number of times the finest grid's cells have been doubled in size
+    doublings = 0
+    pyramid, points = [], None
+    for level in range(levels):
+        coarsened = False
+        while doublings < level * step or (max_points is not None and
+                                           len(cells.counts) > max_points):
+            cells = _coarsen(cells)
+            doublings += 1
+            coarsened = True
+        if points is None or coarsened:
+            points = _to_points(cells)
+        pyramid.append(points)
+    return pyramid
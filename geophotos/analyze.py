@@ -10,12 +10,558 @@ analysis can be performed in order to output characteristics of the
 dataset such as which countries appeared most frequently.
 """
 
+import json
+import math
 import os
 import pickle
-from collections import Counter
+import tempfile
+import zipfile
+from collections import Counter, OrderedDict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from types import MappingProxyType
 
-import fiona
-from osgeo import ogr
+import numpy as np
+
+from .coordinates import CoordinateArray
+from .storage import read_npz, write_npz
+
+# Upper bound on the number of point/edge pairs that are tested at once
+# by the vectorized point in polygon test, which bounds its memory use
+_BLOCK_SIZE = 2 ** 20
+
+# Average number of edges per latitude band of a country's borders
+_EDGES_PER_BAND = 16
+
+# Smallest width in degrees of the cells of the grid that the edges of
+# every border are bucketed into, to find the edges near a point
+_BORDER_CELL_SIZE = 0.5
+
+# Number of single point cache misses whose cells are checked together
+_PENDING_SIZE = 256
+
+# A single row of the in-memory country table held by ReverseGeolocator,
+# where the properties are every field of the shapefile's feature
+Country = namedtuple('Country', ['name', 'geometry', 'envelope',
+                                 'properties'])
+
+# Statistics about the cache of a ReverseGeolocator
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+# Version of the layout of the files saved by Analyzer.save
+ANALYSIS_VERSION = 1
+
+# Settings of an Analyzer that are kept in the files it saves
+_SETTINGS = ['vectorized', 'workers', 'chunk_size', 'cache_size',
+             'cache_precision', 'resolution', 'grid_file']
+
+# Path to the shapefile of world borders that is used by default, which
+# OGR reads straight out of the zip file that ships with the package
+WORLD_BORDERS = '/vsizip/' + os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'data', 'world_borders.zip',
+    'TM_WORLD_BORDERS-0.3.shp',
+)
+
+# Country tables that have been read, keyed by the absolute path of their
+# shapefile, and their simplified versions, keyed by path and tolerance
+_COUNTRY_TABLES = dict()
+_SIMPLIFIED_TABLES = dict()
+
+
+def _table_key(shapefile):
+    """Returns the key of a shapefile's country table. Paths of GDAL's
+    virtual file systems, such as /vsizip/, are already absolute."""
+
+    if shapefile.startswith('/vsi'):
+        return shapefile
+    return os.path.abspath(shapefile)
+
+
+def _shapefile_source(shapefile):
+    """Describes the file that a shapefile is read from by its path,
+    size and modification time, so that a result that was computed from
+    it can tell when it has changed. The file of a path into one of
+    GDAL's virtual file systems, such as /vsizip/, is the archive.
+
+    Returns:
+        A JSON string of the path, size and modification time, or of the
+        path alone if the file can't be found.
+    """
+
+    path = _table_key(shapefile)
+    filepath = path
+    if filepath.startswith('/vsi'):
+        # Strip the file system prefix and walk up to the archive
+        filepath = filepath.split('/', 2)[2]
+        while filepath and not os.path.isfile(filepath):
+            parent = os.path.dirname(filepath)
+            if parent == filepath:
+                break
+            filepath = parent
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return json.dumps([path])
+    return json.dumps([path, stat.st_size, stat.st_mtime_ns])
+
+
+def load_countries(shapefile):
+    """Reads every country of a shapefile into a table. Each shapefile
+    is only read once per process, after which the same table is
+    returned until clear_countries is called. The table is shared, so
+    the properties of its rows are read-only mappings, and their
+    geometries must not be modified either.
+
+    Args:
+        shapefile (str):
+            Path to a shapefile that contains world map information.
+
+    Returns:
+        A tuple with a Country for each feature that has a geometry.
+
+    Raises:
+        OSError: If the shapefile can't be opened.
+    """
+
+    key = _table_key(shapefile)
+    if key not in _COUNTRY_TABLES:
+        from osgeo import ogr
+
+        # Specify the driver to use and open the shapefile
+        driver = ogr.GetDriverByName('ESRI Shapefile')
+        map_file = driver.Open(shapefile)
+        if map_file is None:
+            raise OSError(f'Could not open the shapefile {shapefile}.')
+        layer = map_file.GetLayer()
+        # Clone the geometries so that they outlive the features and the
+        # datasource, which is released as soon as this returns
+        countries = []
+        for feature in layer:
+            geometry = feature.GetGeometryRef()
+            if geometry is not None:
+                country = Country(name=feature.GetField('NAME'),
+                                  geometry=geometry.Clone(),
+                                  envelope=geometry.GetEnvelope(),
+                                  properties=MappingProxyType(
+                                      feature.items()))
+                countries.append(country)
+        _COUNTRY_TABLES[key] = tuple(countries)
+    return _COUNTRY_TABLES[key]
+
+
+def clear_countries():
+    """Forgets every country table that load_countries and
+    simplify_countries have read, so that their geometries are released
+    once no ReverseGeolocator or CountryLayer holds on to them. The
+    tables are read again the next time they are needed."""
+
+    _COUNTRY_TABLES.clear()
+    _SIMPLIFIED_TABLES.clear()
+
+
+def simplify_countries(shapefile, tolerance):
+    """Simplifies the borders of every country of a shapefile, while
+    preserving their topology. The result is remembered for each
+    tolerance. See load_countries.
+
+    Args:
+        shapefile (str):
+            Path to a shapefile that contains world map information.
+        tolerance (float):
+            The maximum distance in degrees that a border may be moved.
+
+    Returns:
+        A tuple with a Country for each feature that has a geometry.
+    """
+
+    key = (_table_key(shapefile), tolerance)
+    if key not in _SIMPLIFIED_TABLES:
+        countries = load_countries(shapefile)
+        if tolerance:
+            countries = tuple(
+                country._replace(geometry=country.geometry.
+                                 SimplifyPreserveTopology(tolerance))
+                for country in countries
+            )
+        _SIMPLIFIED_TABLES[key] = countries
+    return _SIMPLIFIED_TABLES[key]
+
+
+def _geometry_edges(geometry):
+    """Collects the edges of every ring of a polygon or multipolygon.
+
+    Args:
+        geometry (ogr.Geometry):
+            The geometry to collect the edges of.
+
+    Returns:
+        An array with one (x1, y1, x2, y2) row per edge.
+    """
+
+    edges = []
+    stack = [geometry]
+    while stack:
+        current = stack.pop()
+        # Rings are the only geometries without any sub-geometries
+        count = current.GetGeometryCount()
+        if count:
+            stack.extend(current.GetGeometryRef(i) for i in range(count))
+            continue
+        if current.GetPointCount() < 2:
+            continue
+        points = np.array(current.GetPoints(), dtype=float)[:, :2]
+        # Close the ring if the shapefile didn't already
+        if not np.array_equal(points[0], points[-1]):
+            points = np.vstack([points, points[:1]])
+        edges.append(np.hstack([points[:-1], points[1:]]))
+    if not edges:
+        return np.empty((0, 4))
+    return np.vstack(edges)
+
+
+def _points_in_edges(x, y, edges):
+    """Tests which points lie inside of a polygon using the even-odd
+    ray casting rule, which also handles holes and multipolygons.
+
+    Args:
+        x (np.ndarray):
+            The x coordinates (longitudes) of the points.
+        y (np.ndarray):
+            The y coordinates (latitudes) of the points.
+        edges (np.ndarray):
+            The edges of the polygon. See _geometry_edges.
+
+    Returns:
+        A boolean array that is True for each point inside the polygon.
+    """
+
+    inside = np.zeros(len(x), dtype=bool)
+    if not len(edges):
+        return inside
+    x1, y1, x2, y2 = edges.T
+    # Horizontal edges get an infinite slope, but they never straddle
+    # the ray and are therefore masked out anyway
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slopes = (x2 - x1) / (y2 - y1)
+    step = max(1, _BLOCK_SIZE // len(edges))
+    for start in range(0, len(x), step):
+        px = x[start:start+step, np.newaxis]
+        py = y[start:start+step, np.newaxis]
+        # Count the edges that a ray cast from each point towards
+        # positive x crosses; an odd number means the point is inside
+        straddles = (y1 > py) != (y2 > py)
+        with np.errstate(invalid='ignore'):
+            crosses = straddles & (px < x1 + (py - y1) * slopes)
+        inside[start:start+step] = np.count_nonzero(crosses, axis=1) % 2 == 1
+    return inside
+
+
+# Edges of a polygon grouped into horizontal bands of equal height, where
+# the edges of band i are edges[offsets[i]:offsets[i+1]]
+_EdgeBands = namedtuple('_EdgeBands', ['bottom', 'height', 'edges', 'offsets'])
+
+# Edges grouped into the cells of a grid over the whole world, where the
+# edges of the cell in row r and column c are the ones of bucket
+# r * columns + c, and the edges of bucket i are edges[offsets[i]:offsets[i+1]]
+_EdgeGrid = namedtuple('_EdgeGrid', ['size', 'rows', 'columns', 'edges',
+                                     'offsets'])
+
+
+def _band_edges(edges):
+    """Groups the edges of a polygon into horizontal bands, so that a
+    point only needs to be tested against the edges that overlap the
+    band of its latitude. An edge is stored in every band it overlaps.
+
+    Args:
+        edges (np.ndarray):
+            The edges of the polygon. See _geometry_edges.
+
+    Returns:
+        An _EdgeBands of the edges.
+    """
+
+    # Horizontal edges never straddle a ray, so they can be left out
+    edges = edges[edges[:, 1] != edges[:, 3]]
+    if not len(edges):
+        return _EdgeBands(0.0, 1.0, edges, np.zeros(2, dtype=np.intp))
+    lows = np.minimum(edges[:, 1], edges[:, 3])
+    highs = np.maximum(edges[:, 1], edges[:, 3])
+    bottom, top = lows.min(), highs.max()
+    count = max(1, len(edges) // _EDGES_PER_BAND)
+    height = (top - bottom) / count
+    first = np.clip(((lows - bottom) // height).astype(np.intp), 0, count - 1)
+    last = np.clip(((highs - bottom) // height).astype(np.intp), 0, count - 1)
+    spans = last - first + 1
+    edge = np.repeat(np.arange(len(edges)), spans)
+    band = np.repeat(first, spans) + (np.arange(len(edge))
+                                      - np.repeat(np.cumsum(spans) - spans,
+                                                  spans))
+    order = np.argsort(band, kind='stable')
+    offsets = np.searchsorted(band[order], np.arange(count + 1))
+    return _EdgeBands(bottom, height, edges[edge[order]], offsets)
+
+
+def _points_in_bands(x, y, bands):
+    """Tests which points lie inside of a polygon like _points_in_edges,
+    but only against the edges of the band that each point is in.
+
+    Args:
+        x (np.ndarray):
+            The x coordinates (longitudes) of the points.
+        y (np.ndarray):
+            The y coordinates (latitudes) of the points.
+        bands (_EdgeBands):
+            The banded edges of the polygon. See _band_edges.
+
+    Returns:
+        A boolean array that is True for each point inside the polygon.
+    """
+
+    inside = np.zeros(len(x), dtype=bool)
+    count = len(bands.offsets) - 1
+    with np.errstate(invalid='ignore'):
+        band = np.floor((y - bands.bottom) / bands.height)
+    # Points above or below every edge are outside of the polygon
+    band = np.where((band >= 0) & (band <= count),
+                    np.minimum(band, count - 1), -1).astype(np.intp)
+    x1, y1, x2, y2 = bands.edges.T
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slopes = (x2 - x1) / (y2 - y1)
+
+    for points, pair_point, pair_edge in _bucket_pairs(band, bands.offsets):
+        px = x[points][pair_point]
+        py = y[points][pair_point]
+        # Count the edges that a ray cast from each point towards
+        # positive x crosses; an odd number means the point is inside
+        ey1, ey2 = y1[pair_edge], y2[pair_edge]
+        straddles = (ey1 > py) != (ey2 > py)
+        crosses = straddles & (px < x1[pair_edge]
+                               + (py - ey1) * slopes[pair_edge])
+        counts = np.bincount(pair_point[crosses], minlength=len(points))
+        inside[points] = counts % 2 == 1
+    return inside
+
+
+def _bucket_pairs(buckets, offsets):
+    """Pairs every point with each edge of its bucket, such as a band
+    of an _EdgeBands or a cell of an _EdgeGrid, a block of pairs at a
+    time so that at most about _BLOCK_SIZE pairs are held at once.
+
+    Args:
+        buckets (np.ndarray):
+            The bucket of each point, or -1 for points without one.
+        offsets (np.ndarray):
+            Where the edges of each bucket start, followed by the
+            total number of edges.
+
+    Yields:
+        A tuple of the indices of a block of points, the position in
+        the block of the point of each pair, and the edge of each pair.
+    """
+
+    points = np.flatnonzero(buckets >= 0)
+    firsts = offsets[buckets[points]]
+    sizes = offsets[buckets[points] + 1] - firsts
+    crossed = sizes > 0
+    points, firsts, sizes = points[crossed], firsts[crossed], sizes[crossed]
+
+    totals = np.cumsum(sizes)
+    start = 0
+    while start < len(points):
+        done = totals[start - 1] if start else 0
+        stop = max(int(np.searchsorted(totals, done + _BLOCK_SIZE,
+                                       side='right')), start + 1)
+        block = slice(start, stop)
+        pair_sizes = sizes[block]
+        pair_point = np.repeat(np.arange(stop - start), pair_sizes)
+        pair_edge = (np.repeat(firsts[block], pair_sizes)
+                     + np.arange(len(pair_point))
+                     - np.repeat(np.cumsum(pair_sizes) - pair_sizes,
+                                 pair_sizes))
+        yield points[block], pair_point, pair_edge
+        start = stop
+
+
+def _grid_edges(edges, distance):
+    """Groups edges into the cells of a grid over the whole world, so
+    that the cell of a point holds every edge within a distance of it.
+    An edge is stored in every cell it comes that close to.
+
+    Args:
+        edges (np.ndarray):
+            The edges of the polygons. See _geometry_edges.
+        distance (float):
+            The distance in degrees.
+
+    Returns:
+        An _EdgeGrid of the edges.
+    """
+
+    # Cells at least twice as wide as the distance keep each edge in a
+    # handful of cells
+    size = max(_BORDER_CELL_SIZE, 2 * distance)
+    rows, columns = math.ceil(180 / size), math.ceil(360 / size)
+    min_x = np.minimum(edges[:, 0], edges[:, 2]) - distance
+    max_x = np.maximum(edges[:, 0], edges[:, 2]) + distance
+    min_y = np.minimum(edges[:, 1], edges[:, 3]) - distance
+    max_y = np.maximum(edges[:, 1], edges[:, 3]) + distance
+    first_row = np.clip((min_y + 90) // size, 0, rows - 1).astype(np.intp)
+    last_row = np.clip((max_y + 90) // size, 0, rows - 1).astype(np.intp)
+    first_column = np.clip((min_x + 180) // size, 0,
+                           columns - 1).astype(np.intp)
+    last_column = np.clip((max_x + 180) // size, 0,
+                          columns - 1).astype(np.intp)
+    widths = last_column - first_column + 1
+    spans = (last_row - first_row + 1) * widths
+    edge = np.repeat(np.arange(len(edges)), spans)
+    local = np.arange(len(edge)) - np.repeat(np.cumsum(spans) - spans, spans)
+    cell = ((first_row[edge] + local // widths[edge]) * columns
+            + first_column[edge] + local % widths[edge])
+    order = np.argsort(cell, kind='stable')
+    offsets = np.searchsorted(cell[order], np.arange(rows * columns + 1))
+    return _EdgeGrid(size, rows, columns, edges[edge[order]], offsets)
+
+
+def _near_grid(x, y, grid, distance):
+    """Tests which points lie within a distance of any edge, measuring
+    only the edges of the cell that each point is in.
+
+    Args:
+        x (np.ndarray):
+            The x coordinates (longitudes) of the points.
+        y (np.ndarray):
+            The y coordinates (latitudes) of the points.
+        grid (_EdgeGrid):
+            The edges, grouped by at least the distance. See
+            _grid_edges.
+        distance (float):
+            The distance in degrees.
+
+    Returns:
+        A boolean array that is True for each point near an edge.
+    """
+
+    near = np.zeros(len(x), dtype=bool)
+    # Points off the edge of the grid use the nearest cell, which holds
+    # the edges that are clipped to the grid
+    row = np.clip(np.floor((y + 90) / grid.size), 0, grid.rows - 1)
+    column = np.clip(np.floor((x + 180) / grid.size), 0, grid.columns - 1)
+    cells = row * grid.columns + column
+    cells = np.where(np.isfinite(cells), cells, -1).astype(np.intp)
+    for points, pair_point, pair_edge in _bucket_pairs(cells, grid.offsets):
+        x1, y1, x2, y2 = grid.edges[pair_edge].T
+        px = x[points][pair_point] - x1
+        py = y[points][pair_point] - y1
+        dx, dy = x2 - x1, y2 - y1
+        lengths = dx * dx + dy * dy
+        # Degenerate edges are treated as single points
+        lengths[lengths == 0] = np.inf
+        # Project each point onto each edge, clamped to the edge's ends
+        t = np.clip((px * dx + py * dy) / lengths, 0, 1)
+        close = (px - t * dx) ** 2 + (py - t * dy) ** 2 <= distance ** 2
+        near[points[pair_point[close]]] = True
+    return near
+
+
+class _EnvelopeIndex:
+    """Packed Sort-Tile-Recursive (STR) tree over bounding boxes.
+
+    The tree is built once from a sequence of envelopes and is never
+    modified afterwards, which allows it to be packed completely full
+    and keeps the number of nodes visited per query very small.
+
+    Envelopes follow the ordering used by OGR's GetEnvelope method,
+    which is (min_x, max_x, min_y, max_y).
+    """
+
+    def __init__(self, envelopes, payloads=None, capacity=8):
+        """Initializes the object.
+
+        Args:
+            envelopes (list):
+                A list of (min_x, max_x, min_y, max_y) tuples.
+
+        Kwargs:
+            payloads (list) --> None:
+                Values to return from queries, one per envelope. A
+                value of None will use the position of each envelope.
+            capacity (int) --> 8:
+                The maximum number of children of each node.
+        """
+
+        if payloads is None:
+            payloads = range(len(envelopes))
+        self.capacity = capacity
+        # Pack the envelopes into leaves, then keep packing the nodes of
+        # each level into parents until only the root is left
+        entries = list(zip(envelopes, payloads))
+        nodes = self._pack(entries, leaf=True) if entries else []
+        while len(nodes) > 1:
+            nodes = self._pack(nodes, leaf=False)
+        self._root = nodes[0] if nodes else None
+
+    def _pack(self, entries, leaf):
+        """Groups entries into nodes using the STR algorithm.
+
+        Args:
+            entries (list):
+                A list of (envelope, child) tuples.
+            leaf (bool):
+                Whether the children are payloads or other nodes.
+
+        Returns:
+            A list of (envelope, children, leaf) nodes, where the
+            children are the entries that were grouped together.
+        """
+
+        capacity = self.capacity
+        # Split the entries into vertical slices by the x coordinate of
+        # their centers, then sort each slice by the y coordinate
+        leaves = math.ceil(len(entries) / capacity)
+        per_slice = math.ceil(math.sqrt(leaves)) * capacity
+        entries = sorted(entries, key=lambda e: e[0][0] + e[0][1])
+        nodes = []
+        for i in range(0, len(entries), per_slice):
+            column = sorted(entries[i:i+per_slice],
+                            key=lambda e: e[0][2] + e[0][3])
+            for j in range(0, len(column), capacity):
+                group = column[j:j+capacity]
+                envelope = (
+                    min(e[0][0] for e in group),
+                    max(e[0][1] for e in group),
+                    min(e[0][2] for e in group),
+                    max(e[0][3] for e in group),
+                )
+                nodes.append((envelope, group, leaf))
+        return nodes
+
+    def query(self, min_x, max_x, min_y, max_y):
+        """Finds every envelope that intersects the given box.
+
+        Returns:
+            A sorted list of the payloads of the matching envelopes.
+        """
+
+        def intersects(envelope):
+            return not (envelope[0] > max_x or envelope[1] < min_x or
+                        envelope[2] > max_y or envelope[3] < min_y)
+
+        if self._root is None:
+            return []
+        matches = []
+        stack = [self._root]
+        while stack:
+            envelope, children, leaf = stack.pop()
+            if not intersects(envelope):
+                continue
+            if leaf:
+                # Check the entries themselves, since a leaf's envelope
+                # can intersect the box while some of its entries don't
+                matches.extend(payload for envelope, payload in children
+                               if intersects(envelope))
+            else:
+                stack.extend(children)
+        return sorted(matches)
 
 
 class ReverseGeolocator:
@@ -23,22 +569,165 @@ class ReverseGeolocator:
     determine which country it lies in.
     
     Primarily intended to only be called by the Analyze class.
+
+    The shapefile is read into a table of countries, which is shared
+    by every object (and CountryLayer) of the same process that uses
+    the same shapefile. See load_countries and clear_countries.
+
+    Optionally, lookups can be memoized in a least recently used cache
+    that is keyed on coordinates rounded to a given precision. A rounded
+    cell is only stored once it is known to lie entirely inside of one
+    country (or entirely outside of every country), so cached answers
+    are the same as the answers of the exact tests. The cells of single
+    lookups are checked a batch at a time, so a cell can miss a few more
+    times before it is stored.
     """
 
-    def __init__(self, shapefile):
+    def __init__(self, shapefile, cache_size=None, cache_precision=3):
         """Initializes the object.
         
         Args:
             shapefile (str):
                 Path to a shapefile that contains world map information.
+
+        Kwargs:
+            cache_size (int) --> None:
+                The maximum number of rounded cells to remember, after
+                which the least recently used cells are evicted. A
+                value of None will disable the cache.
+            cache_precision (int) --> 3:
+                The number of decimal places that coordinates are
+                rounded to when used as cache keys.
         """
 
         # Initialize instance attributes
         self.shapefile = shapefile
-        # Specify the driver to use and open the shapefile
-        driver = ogr.GetDriverByName('ESRI Shapefile')
-        self.map_file = driver.Open(shapefile)
-        self.layer = self.map_file.GetLayer()
+        self.cache_size = cache_size
+        self.cache_precision = cache_precision
+        self.countries = load_countries(shapefile)
+        self.names = tuple(country.name for country in self.countries)
+        # Index the envelope of each country so that lookups only need
+        # to test the few countries whose envelope contains the point
+        envelopes = [country.envelope for country in self.countries]
+        self._envelopes = np.array(envelopes, dtype=float).reshape(-1, 4)
+        self._index = _EnvelopeIndex(envelopes)
+        # The edges of each country are only needed for batch lookups
+        # and the cache, so they are extracted when first needed
+        self._edges = [None] * len(self.countries)
+        self._bands = [None] * len(self.countries)
+        # Maps rounded coordinates to country codes, in order of use
+        self._cache = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        # Single point misses that have yet to be remembered
+        self._pending = []
+        # The edges of every border near each cell of a grid, which tell
+        # whether a rounded cell is crossed by any border
+        self._border_grid = None
+
+    def _get_edges(self, code):
+        """Returns the edges of a country's polygons. See
+        _geometry_edges."""
+
+        if self._edges[code] is None:
+            self._edges[code] = _geometry_edges(self.countries[code].geometry)
+        return self._edges[code]
+
+    def _get_bands(self, code):
+        """Returns the edges of a country's polygons, grouped into
+        latitude bands. See _band_edges."""
+
+        if self._bands[code] is None:
+            self._bands[code] = _band_edges(self._get_edges(code))
+        return self._bands[code]
+
+    def _get_border_grid(self):
+        """Returns the edges of every country's polygons, grouped into
+        the cells of a grid. See _grid_edges."""
+
+        if self._border_grid is None:
+            edges = [self._get_edges(code)
+                     for code in range(len(self.countries))]
+            edges = np.vstack([np.empty((0, 4)), *edges])
+            self._border_grid = _grid_edges(edges, self._diagonal())
+        return self._border_grid
+
+    def _diagonal(self):
+        """Returns the length of the diagonal of a rounded cell."""
+
+        return 10.0 ** -self.cache_precision * math.sqrt(2)
+
+    def _round(self, values):
+        """Rounds coordinates to the precision of the cache keys."""
+
+        return np.round(values, self.cache_precision)
+
+    def _remember(self, latitudes, longitudes, codes):
+        """Stores the rounded cells of the given points in the cache if
+        they lie entirely inside of their country, or entirely outside
+        of every country.
+
+        Args:
+            latitudes (np.ndarray):
+                The latitudes of the points, one per cell.
+            longitudes (np.ndarray):
+                The longitudes of the points, one per cell.
+            codes (np.ndarray):
+                The exact country code of each point.
+        """
+
+        # Every point that rounds to the same key lies in a square whose
+        # sides are one unit of the precision long, so a point that is
+        # further than the square's diagonal from every border means
+        # that the entire square lies inside of the point's country, or
+        # outside of every country. Only the edges in the cell of the
+        # border grid that each point is in can be that close.
+        settled = ~_near_grid(longitudes, latitudes, self._get_border_grid(),
+                              self._diagonal())
+        key_latitudes = self._round(latitudes).tolist()
+        key_longitudes = self._round(longitudes).tolist()
+        codes = codes.tolist()
+        for position in np.flatnonzero(settled).tolist():
+            key = (key_latitudes[position], key_longitudes[position])
+            self._cache[key] = codes[position]
+            self._cache.move_to_end(key)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def cache_info(self):
+        """Report statistics about the cache.
+
+        Returns:
+            A CacheInfo named tuple with the number of hits, misses,
+            the maximum size and the current size of the cache.
+        """
+
+        return CacheInfo(self._hits, self._misses, self.cache_size,
+                         len(self._cache))
+
+    def cache_clear(self):
+        """Empty the cache and reset its statistics."""
+
+        self._cache.clear()
+        self._pending.clear()
+        self._hits = 0
+        self._misses = 0
+
+    def _exact_code(self, latitude, longitude):
+        """Determines the country code of a single point using OGR's
+        exact Contains test. See get_country."""
+
+        from osgeo import ogr
+
+        # Add the coordinates to a Geometry instance as a point
+        point = ogr.Geometry(ogr.wkbPoint)
+        point.AddPoint(longitude, latitude)
+        # Only test the countries whose envelope contains the point, in
+        # the same order that they appear in the shapefile
+        for code in self._index.query(longitude, longitude, latitude, latitude):
+            if self.countries[code].geometry.Contains(point):
+                return code
+        return -1
 
     def get_country(self, coordinates):
         """Determine which country a set of coordinates lies in.
@@ -56,63 +745,875 @@ class ReverseGeolocator:
         Returns:
             If a match is found, this method returns the name of the
             country that the coordinates lie in. Otherwise, a value
-            of None is returned implicitly.
+            of None is returned.
         """
 
-        # Use fiona to open the shapefile
-        self.shapes = fiona.open(self.shapefile)
-        # Add the coordinates to a Geometry instance as a point
         latitude, longitude = coordinates
-        point = ogr.Geometry(ogr.wkbPoint)
-        point.AddPoint(longitude, latitude)
-        # Iterate through the country shapefile to find which country the
-        # coordinates lie in.
-        for s, shape in enumerate(self.shapes):
-            country = self.layer.GetFeature(s)
-            if country.geometry().Contains(point):
-                return shape['properties']['NAME']
+        cached = bool(self.cache_size) and math.isfinite(latitude) \
+            and math.isfinite(longitude)
+        if cached:
+            # Python's round is much cheaper than numpy's for a single
+            # value, and only differs from it on ties between two cells,
+            # which are both settled whenever the point's cell is
+            precision = self.cache_precision
+            key = (round(float(latitude), precision),
+                   round(float(longitude), precision))
+            code = self._cache.get(key)
+            if code is not None:
+                self._hits += 1
+                self._cache.move_to_end(key)
+                return self.names[code] if code >= 0 else None
+            self._misses += 1
+        code = self._exact_code(latitude, longitude)
+        if cached:
+            # Checking the cells of many misses at once costs about as
+            # much as checking one, so they are remembered in batches
+            self._pending.append((latitude, longitude, code))
+            if len(self._pending) >= _PENDING_SIZE:
+                latitudes, longitudes, codes = map(np.array,
+                                                   zip(*self._pending))
+                self._pending.clear()
+                self._remember(latitudes, longitudes, codes)
+        return self.names[code] if code >= 0 else None
+
+    def _exact_codes(self, latitudes, longitudes):
+        """Determines the country code of many points using vectorized
+        ray casting. See get_countries."""
+
+        codes = np.full(len(latitudes), -1, dtype=np.intp)
+        # Sort the points by longitude so that the points inside of each
+        # country's envelope can be narrowed down with a binary search
+        order = np.argsort(longitudes, kind='stable')
+        ordered = longitudes[order]
+        for code, (min_x, max_x, min_y, max_y) in enumerate(self._envelopes):
+            start = np.searchsorted(ordered, min_x, side='left')
+            stop = np.searchsorted(ordered, max_x, side='right')
+            candidates = order[start:stop]
+            # Countries are tested in shapefile order, so points that
+            # were already matched keep their first match
+            lats = latitudes[candidates]
+            candidates = candidates[(lats >= min_y) & (lats <= max_y)
+                                    & (codes[candidates] == -1)]
+            if not len(candidates):
+                continue
+            inside = _points_in_bands(longitudes[candidates],
+                                      latitudes[candidates],
+                                      self._get_bands(code))
+            codes[candidates[inside]] = code
+        return codes
+
+    def get_countries(self, latitudes, longitudes, as_codes=False):
+        """Determine which country each of many sets of coordinates
+        lies in, all at once.
+
+        Rather than creating a geometry for every point, the points are
+        tested against the edges of each country's polygons using
+        vectorized ray casting. Points that lie exactly on a border may
+        therefore be assigned differently than by get_country.
+
+        Example usage:
+        >>> locator = ReverseGeolocator(WORLD_BORDERS)
+        >>> locator.get_countries([55.644904, 40.7128], [12.576965, -74.006])
+        array(['Denmark', 'United States'], dtype=object)
+
+        Args:
+            latitudes (array-like):
+                The latitudes of the points.
+            longitudes (array-like):
+                The longitudes of the points.
+
+        Kwargs:
+            as_codes (bool) --> False:
+                Return integer country codes instead of names. Each code
+                is a position in the instance's names attribute, and
+                points that don't lie in any country are given -1.
+
+        Returns:
+            An array with the name (or code) of the country that each
+            point lies in. Points that don't lie in any country are
+            given a value of None.
+        """
+
+        latitudes = np.asarray(latitudes, dtype=float).ravel()
+        longitudes = np.asarray(longitudes, dtype=float).ravel()
+        if not self.cache_size:
+            codes = self._exact_codes(latitudes, longitudes)
+        else:
+            codes = np.full(len(latitudes), -1, dtype=np.intp)
+            finite = np.flatnonzero(np.isfinite(latitudes)
+                                    & np.isfinite(longitudes))
+            # Look up each distinct rounded cell only once
+            keys = np.column_stack([self._round(latitudes[finite]),
+                                    self._round(longitudes[finite])])
+            keys, first, inverse = np.unique(keys, axis=0, return_index=True,
+                                             return_inverse=True)
+            inverse = inverse.ravel()
+            found = np.full(len(keys), -2, dtype=np.intp)
+            for position, key in enumerate(map(tuple, keys.tolist())):
+                code = self._cache.get(key)
+                if code is not None:
+                    found[position] = code
+                    self._cache.move_to_end(key)
+            hit = found[inverse] != -2
+            self._hits += int(np.count_nonzero(hit))
+            self._misses += int(len(hit) - np.count_nonzero(hit))
+            codes[finite[hit]] = found[inverse[hit]]
+            # Test the rest of the points exactly, then remember the cells
+            # that turned out to be safe to answer from the cache
+            missed = finite[~hit]
+            codes[missed] = self._exact_codes(latitudes[missed],
+                                              longitudes[missed])
+            samples = finite[first[found == -2]]
+            self._remember(latitudes[samples], longitudes[samples],
+                           codes[samples])
+        if as_codes:
+            return codes
+        # Use the last position of the lookup table for unmatched points
+        lookup = np.array(self.names + (None,), dtype=object)
+        return lookup[codes]
+
+    def close(self):
+        """Release the cache. Lookups can still be made afterwards since
+        the countries are held in memory. The shared table of countries
+        stays loaded until clear_countries is called."""
+
+        self._cache.clear()
+
+    def __enter__(self):
+        """Use the object as a context manager."""
+
+        return self
+
+    def __exit__(self, *exc_info):
+        """Release the cache upon exiting."""
+
+        self.close()
+
+
+class GridGeolocator:
+    """Class that determines which country a set of coordinates lies in
+    using a precomputed grid of country codes.
+
+    Each cell of the grid either holds the code of the country that it
+    lies entirely inside of, marks that it lies entirely outside of
+    every country, or marks that a border passes through it. Only the
+    points in the latter, ambiguous cells are tested exactly using a
+    ReverseGeolocator, so the answers are the same as its answers while
+    most points are answered with a single array lookup.
+
+    The grid can be saved to a cache file, which is memory-mapped when
+    the object is initialized rather than computed again. The file also
+    records the resolution and the shapefile that the grid was computed
+    from, and the grid is computed again if either doesn't match.
+    """
+
+    # Grid values of cells outside of every country and of cells that a
+    # border passes through; every other value is a country code plus 1
+    OUTSIDE = 0
+    AMBIGUOUS = np.iinfo(np.uint16).max
+
+    def __init__(self, shapefile, resolution=0.1, cache_file=None,
+                 **kwargs):
+        """Initializes the object.
+
+        Args:
+            shapefile (str):
+                Path to a shapefile that contains world map information.
+
+        Kwargs:
+            resolution (float) --> 0.1:
+                The width and height of each cell of the grid, in
+                degrees.
+            cache_file (str) --> None:
+                Path to an .npz file to load the grid from, or to save
+                it to if it doesn't exist yet or is out of date. The
+                file is written exactly at this path. A value of None
+                will compute the grid without saving it.
+            **kwargs:
+                Passed on to the ReverseGeolocator that tests the
+                points in ambiguous cells.
+        """
+
+        # Initialize instance attributes
+        self.locator = ReverseGeolocator(shapefile, **kwargs)
+        self.shapefile = shapefile
+        self.resolution = resolution
+        self.cache_file = cache_file
+        self.names = self.locator.names
+        if len(self.names) >= self.AMBIGUOUS:
+            raise ValueError('Too many countries to store in the grid.')
+        shape = (math.ceil(180 / resolution), math.ceil(360 / resolution))
+        source = _shapefile_source(shapefile)
+        # Memory-map a previously saved grid if it was computed from the
+        # same shapefile at the same resolution
+        self.grid = None
+        if cache_file is not None and os.path.isfile(cache_file):
+            try:
+                arrays = read_npz(cache_file)
+                grid = arrays['grid']
+                matches = (grid.shape == shape and grid.dtype == np.uint16
+                           and float(arrays['resolution']) == resolution
+                           and str(arrays['source']) == source)
+            except (KeyError, OSError, ValueError, zipfile.BadZipFile):
+                matches = False
+            if matches:
+                self.grid = grid
+        if self.grid is None:
+            self.grid = self._build(shape)
+            if cache_file is not None:
+                write_npz(cache_file, {'grid': self.grid,
+                                       'resolution': np.array(resolution),
+                                       'source': np.array(source)})
+                self.grid = read_npz(cache_file)['grid']
+
+    def _build(self, shape):
+        """Computes the grid of country codes.
+
+        Args:
+            shape (tuple):
+                The number of rows and columns of the grid.
+
+        Returns:
+            The grid as a two-dimensional array of unsigned integers.
+        """
+
+        rows, columns = shape
+        resolution = self.resolution
+        grid = np.zeros(shape, dtype=np.uint16)
+        # Mark every cell that a border passes through as ambiguous by
+        # sampling points along each edge no more than one cell apart.
+        # The part of an edge between two samples can then only pass
+        # through the neighbours of the first sample's cell.
+        for code in range(len(self.names)):
+            edges = self.locator._get_edges(code)
+            if not len(edges):
+                continue
+            x1, y1, x2, y2 = edges.T
+            steps = np.ceil(np.hypot(x2 - x1, y2 - y1) / resolution)
+            steps = np.maximum(steps, 1).astype(np.intp)
+            edge = np.repeat(np.arange(len(edges)), steps + 1)
+            offsets = np.cumsum(steps + 1) - (steps + 1)
+            t = (np.arange(len(edge)) - offsets[edge]) / steps[edge]
+            row, column = self._cells_of(y1[edge] + t * (y2 - y1)[edge],
+                                         x1[edge] + t * (x2 - x1)[edge],
+                                         shape)
+            for row_offset in (-1, 0, 1):
+                for column_offset in (-1, 0, 1):
+                    grid[np.clip(row + row_offset, 0, rows - 1),
+                         np.clip(column + column_offset, 0, columns - 1)] = \
+                        self.AMBIGUOUS
+        # Every other cell lies entirely inside or outside of each
+        # country, so only its center needs to be tested. Each row of
+        # centers is tested at once by finding where it crosses the
+        # edges, in shapefile order so that the first match is kept.
+        for code, country in enumerate(self.locator.countries):
+            edges = self.locator._get_edges(code)
+            if not len(edges):
+                continue
+            min_x, max_x, min_y, max_y = country.envelope
+            (row_start, row_stop), (column_start, column_stop) = \
+                self._cells_of(np.array([min_y, max_y]),
+                               np.array([min_x, max_x]), shape)
+            row_indices = np.arange(row_start, row_stop + 1)
+            column_indices = np.arange(column_start, column_stop + 1)
+            center_y = -90 + (row_indices + 0.5) * resolution
+            center_x = -180 + (column_indices + 0.5) * resolution
+            x1, y1, x2, y2 = edges.T
+            with np.errstate(divide='ignore', invalid='ignore'):
+                slopes = (x2 - x1) / (y2 - y1)
+            step = max(1, _BLOCK_SIZE // len(edges))
+            for start in range(0, len(row_indices), step):
+                py = center_y[start:start+step, np.newaxis]
+                straddles = (y1 > py) != (y2 > py)
+                with np.errstate(invalid='ignore'):
+                    crossings = x1 + (py - y1) * slopes
+                for offset, row in enumerate(row_indices[start:start+step]):
+                    xs = np.sort(crossings[offset][straddles[offset]])
+                    if not len(xs):
+                        continue
+                    inside = np.searchsorted(xs, center_x, side='right') % 2
+                    cells = grid[row, column_start:column_stop + 1]
+                    cells[(inside == 1) & (cells == self.OUTSIDE)] = code + 1
+        return grid
+
+    def _cells_of(self, latitudes, longitudes, shape):
+        """Determines the row and column of the cell of each point in a
+        grid of the given shape."""
+
+        rows, columns = shape
+        row = np.floor((latitudes + 90) / self.resolution)
+        column = np.floor((longitudes + 180) / self.resolution)
+        return (np.clip(row, 0, rows - 1).astype(np.intp),
+                np.clip(column, 0, columns - 1).astype(np.intp))
+
+    def get_country(self, coordinates):
+        """Determine which country a set of coordinates lies in. See
+        ReverseGeolocator.get_country.
+
+        Args:
+            coordinates (list/tuple):
+                A list of tuple of length two, with the first element
+                being latitude and the second being longitude.
+
+        Returns:
+            If a match is found, this method returns the name of the
+            country that the coordinates lie in. Otherwise, a value
+            of None is returned.
+        """
+
+        latitude, longitude = coordinates
+        if not (math.isfinite(latitude) and math.isfinite(longitude)):
+            return None
+        row, column = self._cells_of(latitude, longitude, self.grid.shape)
+        value = int(self.grid[row, column])
+        if value == self.AMBIGUOUS:
+            return self.locator.get_country(coordinates)
+        return self.names[value - 1] if value != self.OUTSIDE else None
+
+    def get_countries(self, latitudes, longitudes, as_codes=False):
+        """Determine which country each of many sets of coordinates
+        lies in, all at once. See ReverseGeolocator.get_countries.
+
+        Args:
+            latitudes (array-like):
+                The latitudes of the points.
+            longitudes (array-like):
+                The longitudes of the points.
+
+        Kwargs:
+            as_codes (bool) --> False:
+                Return integer country codes instead of names. Each code
+                is a position in the instance's names attribute, and
+                points that don't lie in any country are given -1.
+
+        Returns:
+            An array with the name (or code) of the country that each
+            point lies in. Points that don't lie in any country are
+            given a value of None.
+        """
+
+        latitudes = np.asarray(latitudes, dtype=float).ravel()
+        longitudes = np.asarray(longitudes, dtype=float).ravel()
+        codes = np.full(len(latitudes), -1, dtype=np.intp)
+        finite = np.flatnonzero(np.isfinite(latitudes)
+                                & np.isfinite(longitudes))
+        rows, columns = self._cells_of(latitudes[finite], longitudes[finite],
+                                       self.grid.shape)
+        values = np.asarray(self.grid[rows, columns]).astype(np.intp)
+        codes[finite] = values - 1
+        # Fall back to the exact test for the points in ambiguous cells
+        ambiguous = finite[values == self.AMBIGUOUS]
+        codes[ambiguous] = self.locator.get_countries(
+            latitudes[ambiguous], longitudes[ambiguous], as_codes=True,
+        )
+        if as_codes:
+            return codes
+        # Use the last position of the lookup table for unmatched points
+        lookup = np.array(self.names + (None,), dtype=object)
+        return lookup[codes]
+
+    def cache_info(self):
+        """Report statistics about the cache of the ReverseGeolocator
+        that tests the points in ambiguous cells."""
+
+        return self.locator.cache_info()
+
+    def close(self):
+        """Release the cache of the underlying ReverseGeolocator."""
+
+        self.locator.close()
+
+    def __enter__(self):
+        """Use the object as a context manager."""
+
+        return self
+
+    def __exit__(self, *exc_info):
+        """Release the cache upon exiting."""
+
+        self.close()
+
+
+# The locator of each worker process that Analyzer geocodes with, which
+# is loaded once per process by _initialize_worker
+_worker_locator = None
+
+
+def _create_locator(shapefile, options):
+    """Creates the locator that Analyzer determines countries with.
+
+    Args:
+        shapefile (str):
+            Path to a shapefile that contains world map information.
+        options (dict):
+            Keyword arguments of the locator. A resolution other than
+            None creates a GridGeolocator instead of a
+            ReverseGeolocator.
+
+    Returns:
+        The locator.
+    """
+
+    options = dict(options)
+    resolution = options.pop('resolution', None)
+    cache_file = options.pop('cache_file', None)
+    if resolution is None:
+        return ReverseGeolocator(shapefile, **options)
+    return GridGeolocator(shapefile, resolution=resolution,
+                          cache_file=cache_file, **options)
+
+
+def _locate(locator, data, vectorized):
+    """Determines the country of each datum using a locator.
+
+    Args:
+        locator (ReverseGeolocator/GridGeolocator):
+            The locator to determine the countries with.
+        data (list/CoordinateArray):
+            A list of lists/tuples containing coordinates.
+        vectorized (bool):
+            Whether to use the locator's batch lookup.
+
+    Returns:
+        A list of countries, in the same order as the data.
+    """
+
+    if not vectorized:
+        return [locator.get_country(datum) for datum in data]
+    if isinstance(data, CoordinateArray):
+        countries = locator.get_countries(data.latitudes, data.longitudes)
+        return countries.tolist()
+    # Missing coordinates are converted to NaN, which never lies in any
+    # country
+    coordinates = np.array(data, dtype=float).reshape(-1, 2)
+    countries = locator.get_countries(coordinates[:, 0], coordinates[:, 1])
+    return countries.tolist()
+
+
+def _initialize_worker(shapefile, options):
+    """Loads the world borders once in a worker process."""
+
+    global _worker_locator
+    _worker_locator = _create_locator(shapefile, options)
+
+
+def _locate_chunk(chunk, vectorized):
+    """Determines the country of each datum of a chunk in a worker
+    process. See _locate.
+
+    Returns:
+        A tuple of the worker's process ID, the statistics of its
+        locator's cache so far, and the list of countries.
+    """
+
+    countries = _locate(_worker_locator, chunk, vectorized)
+    return os.getpid(), _worker_locator.cache_info(), countries
+
+
+def _count_codes(codes, names):
+    """Counts the countries of a loaded analysis from their codes.
+
+    Args:
+        codes (array):
+            The code of each datum, where -1 means that it isn't in any
+            country.
+        names (list):
+            The name of each code.
+
+    Returns:
+        A Counter of the countries, including None.
+    """
+
+    counts = np.bincount(np.asarray(codes, dtype=np.int64) + 1,
+                         minlength=len(names) + 1)
+    counter = Counter({name: count for name, count
+                       in zip(names, counts[1:].tolist()) if count})
+    if counts[0]:
+        counter[None] = int(counts[0])
+    return counter
 
 
 class Analyzer:
     """Performs analysis of given coordinate data."""
 
-    def __init__(self, data, save_pickle=None):
+    def __init__(self, data, save_pickle=None, vectorized=True, workers=None,
+                 chunk_size=100000, cache_size=None, cache_precision=3,
+                 resolution=None, grid_file=None):
         """Initializes the object. Loops through the data that was
         passed in, which may take a very long time; therefore, an
         option to pickle the resulting object is included.
         
         Args:
-            data (list):
+            data (list/CoordinateArray):
                 A list of lits/tuples containing coordinates.
                 e.g. [(latitude, longitude), ...]
+                A CoordinateArray is split into chunks without being
+                copied, and sent to other processes as whole columns.
                 
         Kwargs:
             save_pickle (str) --> None:
                 Path to save the pickled Analyzer object to.
-                A value of None will not save a pickle.
+                A value of None will not save a pickle. See the save
+                method for a much more compact alternative.
+            vectorized (bool) --> True:
+                Determine the countries of all of the data at once
+                using ReverseGeolocator.get_countries. False will look
+                up each datum individually instead.
+            workers (int) --> None:
+                The number of processes to determine the countries
+                with. A value of None or 1 will use the current process
+                only, as will data that fits in a single chunk.
+            chunk_size (int) --> 100000:
+                The number of data per chunk that is handed to each
+                process at a time.
+            cache_size (int) --> None:
+                The maximum number of rounded coordinates that each
+                ReverseGeolocator remembers. A value of None will not
+                use a cache. See the ReverseGeolocator documentation.
+            cache_precision (int) --> 3:
+                The number of decimal places that coordinates are
+                rounded to when used as cache keys.
+            resolution (float) --> None:
+                Determine the countries using a GridGeolocator with
+                cells of this many degrees, which is much faster. A
+                value of None will use a ReverseGeolocator only.
+            grid_file (str) --> None:
+                Path to an .npz file to load the GridGeolocator's grid
+                from, or to save it to if it doesn't exist yet or is
+                out of date. Only used when a resolution is given.
         """
 
         # Initialize instance attributes
         self.data = data
-        self.countries = self._get_countries()
+        self.vectorized = vectorized
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.cache_size = cache_size
+        self.cache_precision = cache_precision
+        self.resolution = resolution
+        self.grid_file = grid_file
+        # Combined statistics of the caches that were used, if any
+        self.cache_info = None
+        # Locator of the current process, which is kept for extend
+        self._locator = None
+        # Countries of a loaded analysis are only decoded when needed
+        self._codes = None
+        self._names = None
+        self.countries = self._get_countries(data)
+        # Running count of each country, which the queries read from
+        self._counter = Counter(self.countries)
+        # Optionally save a pickle to the specified path
+        if save_pickle is not None:
+            with open(save_pickle, 'wb') as output:
+                pickle.dump(self, output)
+
+    def extend(self, new_data, save_pickle=None):
+        """Adds data to the analysis. Only the new data is geocoded,
+        and the counts of the countries are updated rather than counted
+        again.
+
+        Args:
+            new_data (list/CoordinateArray):
+                A list of lists/tuples containing coordinates.
+                e.g. [(latitude, longitude), ...]
+                When the data is a CoordinateArray, a list is converted
+                to one, and data without timestamps is added with
+                missing timestamps if the data has them. When the data
+                is a list, it is extended in place.
+
+        Kwargs:
+            save_pickle (str) --> None:
+                Path to save the pickled Analyzer object to.
+                A value of None will not save a pickle.
+        """
+
+        if isinstance(self.data, CoordinateArray):
+            if not isinstance(new_data, CoordinateArray):
+                new_data = CoordinateArray.from_records(new_data)
+            if (self.data.timestamps is not None
+                    and new_data.timestamps is None):
+                # Keep the timestamps of the data, so that it can still
+                # be narrowed down to a window of time
+                missing = np.full(len(new_data), np.datetime64('NaT'),
+                                  dtype='datetime64[ms]')
+                new_data = CoordinateArray(new_data.latitudes,
+                                           new_data.longitudes, missing)
+        countries = self._get_countries(new_data)
+        if isinstance(self.data, CoordinateArray):
+            self.data = CoordinateArray.concatenate([self.data, new_data])
+        elif isinstance(self.data, list):
+            self.data.extend(new_data)
+        else:
+            self.data = [*self.data, *new_data]
+        if self._countries is None:
+            # Keep the countries of a loaded analysis encoded
+            self._extend_codes(countries)
+        else:
+            self._countries.extend(countries)
+        self._counter.update(countries)
         # Optionally save a pickle to the specified path
         if save_pickle is not None:
             with open(save_pickle, 'wb') as output:
                 pickle.dump(self, output)
 
-    def _get_countries(self):
+    @property
+    def countries(self):
+        """Returns the list of the country of each datum, decoding the
+        countries of a loaded analysis the first time."""
+
+        if self._countries is None:
+            # A code of -1, which marks data outside of every country,
+            # picks the None at the end of the names
+            names = np.array([*self._names, None], dtype=object)
+            self._countries = names[self._codes].tolist()
+            self._codes = self._names = None
+        return self._countries
+
+    @countries.setter
+    def countries(self, countries):
+        """Sets the list of the country of each datum."""
+
+        self._countries = countries
+
+    def _extend_codes(self, countries):
+        """Appends countries to the codes of a loaded analysis, adding
+        the names that it doesn't have yet.
+
+        Args:
+            countries (list):
+                The country of each new datum.
+        """
+
+        # The names may be shared with an analysis narrowed down from
+        # this one, so new names go into a copy of them
+        names = list(self._names)
+        lookup = {name: code for code, name in enumerate(names)}
+        for country in countries:
+            if country is not None and country not in lookup:
+                lookup[country] = len(names)
+                names.append(country)
+        self._names = names
+        dtype = self._codes.dtype
+        if len(names) > np.iinfo(dtype).max:
+            dtype = np.int32
+        codes = np.fromiter((-1 if country is None else lookup[country]
+                             for country in countries),
+                            dtype=dtype, count=len(countries))
+        self._codes = np.concatenate([self._codes.astype(dtype, copy=False),
+                                      codes])
+
+    def _encode_countries(self):
+        """Encodes the country of each datum as an integer.
+
+        Returns:
+            A tuple of the code of each datum, where -1 means that it
+            isn't in any country, and the list of names of the codes.
+        """
+
+        if self._countries is None:
+            return self._codes, self._names
+        names = sorted(country for country in self._counter if country)
+        dtype = np.int16 if len(names) < 2**15 else np.int32
+        lookup = {name: code for code, name in enumerate(names)}
+        codes = np.fromiter((lookup.get(country, -1)
+                             for country in self._countries),
+                            dtype=dtype, count=len(self._countries))
+        return codes, names
+
+    def save(self, filepath):
+        """Saves the analysis to a compact .npz file, which can be read
+        back almost instantly with Analyzer.load. Countries are stored
+        as integer codes, and coordinates as columns.
+
+        Args:
+            filepath (str):
+                Location to save the file.
+        """
+
+        codes, names = self._encode_countries()
+        data = self.data
+        if not isinstance(data, CoordinateArray):
+            data = CoordinateArray.from_records(data)
+        settings = {name: getattr(self, name) for name in _SETTINGS}
+        arrays = {
+            'version': np.array(ANALYSIS_VERSION),
+            'settings': np.array(json.dumps(settings)),
+            'names': np.array(names, dtype=str),
+            'codes': codes,
+            'latitude': data.latitudes,
+            'longitude': data.longitudes,
+        }
+        if data.timestamps is not None:
+            arrays['timestamp'] = data.timestamps
+        write_npz(filepath, arrays)
+
+    @classmethod
+    def load(cls, filepath, mmap=True):
+        """Loads an analysis that was saved by Analyzer.save.
+
+        Args:
+            filepath (str):
+                Location of the file.
+
+        Kwargs:
+            mmap (bool) --> True:
+                Whether to memory-map the coordinates and country codes
+                instead of reading them into memory.
+
+        Returns:
+            The Analyzer, with the data as a CoordinateArray.
+
+        Raises:
+            ValueError: If the file was saved by a newer version.
+        """
+
+        arrays = read_npz(filepath, mmap=mmap)
+        version = int(arrays['version'])
+        if version > ANALYSIS_VERSION:
+            raise ValueError(f'Unsupported analysis file version {version}.')
+
+        analyzer = cls.__new__(cls)
+        settings = json.loads(str(arrays['settings']))
+        for name in _SETTINGS:
+            setattr(analyzer, name, settings.get(name))
+        analyzer.data = CoordinateArray(arrays['latitude'],
+                                        arrays['longitude'],
+                                        arrays.get('timestamp'))
+        analyzer.cache_info = None
+        analyzer._locator = None
+        analyzer._countries = None
+        analyzer._codes = arrays['codes']
+        analyzer._names = arrays['names'].tolist()
+        analyzer._counter = _count_codes(analyzer._codes, analyzer._names)
+        return analyzer
+
+    def between(self, start=None, end=None):
+        """Narrows the analysis down to the data from a window of time,
+        without determining any countries again. The data must be a
+        CoordinateArray with timestamps, and is found with a binary
+        search if it is sorted chronologically. See the
+        CoordinateArray.between method.
+
+        Kwargs:
+            start (int/str/datetime/datetime64) --> None:
+                The beginning of the window. A value of None will start
+                at the earliest timestamp.
+                e.g. '2019-03', datetime(2019, 3, 14)
+            end (int/str/datetime/datetime64) --> None:
+                The end of the window, which is excluded from it. A
+                value of None will end after the latest timestamp.
+
+        Returns:
+            A new Analyzer of the data in the window.
+        """
+
+        if (not isinstance(self.data, CoordinateArray)
+                or self.data.timestamps is None):
+            raise ValueError('Only a CoordinateArray with timestamps can be '
+                             'narrowed down to a window of time.')
+        window = self.data.time_index(start, end)
+
+        analyzer = self.__class__.__new__(self.__class__)
+        analyzer.__dict__.update(self.__dict__)
+        analyzer.data = self.data[window]
+        if self._countries is None:
+            analyzer._codes = self._codes[window]
+            analyzer._counter = _count_codes(analyzer._codes, self._names)
+        else:
+            if not isinstance(window, slice):
+                window = np.flatnonzero(window)
+                countries = [self._countries[i] for i in window.tolist()]
+            else:
+                countries = self._countries[window]
+            analyzer._countries = countries
+            analyzer._counter = Counter(countries)
+        return analyzer
+
+    def __getstate__(self):
+        """Leave the locator out of pickles, since its geometries can't
+        be pickled."""
+
+        state = self.__dict__.copy()
+        state['_locator'] = None
+        return state
+
+    def __setstate__(self, state):
+        """Restore a pickle, including those of older versions, which
+        didn't keep the counts of the countries."""
+
+        state = dict(state)
+        if 'countries' in state:
+            state['_countries'] = state.pop('countries')
+        self.__dict__.update(state)
+        for name in ('_locator', '_codes', '_names'):
+            self.__dict__.setdefault(name, None)
+        if '_counter' not in state:
+            self._counter = Counter(self.countries)
+
+    def _get_countries(self, data):
         """Gathers an exhaustive list of countries that appear in the
         data. This may take awhile for large datasets.
+
+        Args:
+            data (list/CoordinateArray):
+                The coordinates to determine the countries of.
         
         Returns:
             A list of countries.
         """
         
-        # Pass a shapefile to a ReverseGeolocator instance
-        shapefile_path = os.path.join('data', 'world_borders.shp')
-        locator = ReverseGeolocator(shapefile_path)
-        # Generate a list of countries that appear in the data
-        return [locator.get_country(datum) for datum in self.data]
+        shapefile_path = WORLD_BORDERS
+        options = {
+            'cache_size': self.cache_size,
+            'cache_precision': self.cache_precision,
+            'resolution': self.resolution,
+            'cache_file': self.grid_file,
+        }
+        # Fall back to the current process if there isn't enough data to
+        # be worth the cost of starting the other processes
+        serial = (self.workers is None or self.workers <= 1
+                  or len(data) <= self.chunk_size)
+        if serial:
+            # Pass a shapefile to a locator instance, which is kept so
+            # that later calls don't need to load it again
+            if self._locator is None:
+                self._locator = _create_locator(shapefile_path, options)
+            countries = _locate(self._locator, data, self.vectorized)
+            if self.cache_size:
+                self.cache_info = self._locator.cache_info()
+            return countries
+        # Otherwise, split the data into chunks and let each process load
+        # the shapefile once before geocoding the chunks it's given
+        chunks = [data[i:i+self.chunk_size]
+                  for i in range(0, len(data), self.chunk_size)]
+        with tempfile.TemporaryDirectory() as directory:
+            # Compute the grid once up front so that every process can
+            # memory-map it instead of computing it again
+            if self.resolution is not None:
+                if self.grid_file is None:
+                    grid_file = os.path.join(directory, 'grid.npz')
+                    options['cache_file'] = grid_file
+                _create_locator(shapefile_path, options).close()
+            initargs = (shapefile_path, options)
+            with ProcessPoolExecutor(max_workers=self.workers,
+                                     initializer=_initialize_worker,
+                                     initargs=initargs) as executor:
+                # Results are yielded in the order of the chunks, which
+                # keeps the countries in the same order as the data
+                results = list(executor.map(_locate_chunk, chunks,
+                                            repeat(self.vectorized)))
+        if self.cache_size:
+            # Each process reports the running statistics of its own
+            # cache, so only the last report of each process is needed.
+            # Together the caches can hold the sum of their sizes
+            latest = {pid: info for pid, info, _ in results}
+            self.cache_info = CacheInfo(
+                hits=sum(info.hits for info in latest.values()),
+                misses=sum(info.misses for info in latest.values()),
+                maxsize=sum(info.maxsize for info in latest.values()),
+                currsize=sum(info.currsize for info in latest.values()),
+            )
+        return [country for _, _, result in results for country in result]
 
     def _count_countries(self, include_none=False):
         """Counts the number of times each country appears in the data,
@@ -126,12 +1627,12 @@ class Analyzer:
             A counter object containing information about the data.
         """
         
-        # Pass the list of countries to the counter object, filtering out
-        # None values if desired.
+        # Copy the running counts, filtering out None values if desired
         if include_none:
-            counter = Counter(self.countries)
+            counter = Counter(self._counter)
         else:
-            counter = Counter(country for country in self.countries if country)
+            counter = Counter({country: count for country, count
+                               in self._counter.items() if country})
         return counter
 
     def unique_countries(self, include_none=False):
@@ -145,12 +1646,12 @@ class Analyzer:
             A set of unique countries (therefore no duplicates).
         """
 
-        # Get rid of duplicates and return the remaining set, filtering out
-        # None values if desired
+        # The counted countries are already unique, so return them as a
+        # set, filtering out None values if desired
         if include_none:
-            return set(self.countries)
+            return set(self._counter)
         else:
-            return set(country for country in self.countries if country)
+            return set(country for country in self._counter if country)
 
     def number_of_countries(self, include_none=False):
         """Counts the number of unique countries that appear in the
@@ -164,12 +1665,12 @@ class Analyzer:
             Number of unique countries as an integer.
         """
 
-        # Get rid of duplicates and count the remaining countries, filtering
-        # out None values if desired.
+        # Count the already unique countries, filtering out None values if
+        # desired.
         if include_none:
-            return len(set(self.countries))
+            return len(self._counter)
         else:
-            return len([country for country in set(self.countries) if country])
+            return len([country for country in self._counter if country])
 
     def country_frequency(self, include_none=False, sort=True):
         """Counts the number of times that each country appeared in the
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+
+"""
+geophotos.cache
+~~~~~~~~~~~~~~~
+
+Persists the timestamp and coordinates pulled from each image in an
+SQLite database, keyed by the image's path, size and modification time.
+Subsequent runs then only need to read the images that are new or have
+changed since they were last read.
+"""
+
+import os
+import sqlite3
+from datetime import datetime
+
+# Version of the database layout, which is stored in the database itself
+SCHEMA_VERSION = 1
+
+
+class MetadataCache:
+    """An on-disk cache of the timestamp and coordinates of images.
+
+    An entry is only returned while the size and modification time of
+    its image match the ones it was stored with, so changed images are
+    read again automatically. Entries of deleted images can be removed
+    with the prune method.
+
+    The object can be used as a context manager, which commits any
+    pending entries and closes the database upon exiting.
+    """
+
+    def __init__(self, filepath):
+        """Initializes the object, creating the database if it does not
+        exist yet.
+
+        Args:
+            filepath (str):
+                Path to the SQLite database file.
+        """
+
+        self.filepath = filepath
+        self.connection = sqlite3.connect(filepath)
+        version, = self.connection.execute('PRAGMA user_version').fetchone()
+        # Start over if the database was created by a different version
+        if version not in (0, SCHEMA_VERSION):
+            self.connection.execute('DROP TABLE IF EXISTS metadata')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS metadata ('
+            'path TEXT PRIMARY KEY, '
+            'size INTEGER NOT NULL, '
+            'mtime INTEGER NOT NULL, '
+            'timestamp TEXT, '
+            'latitude REAL, '
+            'longitude REAL)'
+        )
+        self.connection.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        self.connection.commit()
+
+    def lookup(self, path, stat=None):
+        """Look up the cached information of an image.
+
+        Args:
+            path (str):
+                Filepath to the image.
+
+        Kwargs:
+            stat (os.stat_result) --> None:
+                The result of os.stat for the image, if it is already
+                known. A value of None will call os.stat.
+
+        Returns:
+            A tuple of the timestamp, latitude and longitude of the
+            image, or None if it is not cached or has changed since.
+        """
+
+        stat = os.stat(path) if stat is None else stat
+        row = self.connection.execute(
+            'SELECT timestamp, latitude, longitude FROM metadata '
+            'WHERE path = ? AND size = ? AND mtime = ?',
+            (os.path.abspath(path), stat.st_size, stat.st_mtime_ns),
+        ).fetchone()
+        if row is None:
+            return None
+        timestamp, latitude, longitude = row
+        if timestamp is not None:
+            timestamp = datetime.fromisoformat(timestamp)
+        return timestamp, latitude, longitude
+
+    def store(self, path, timestamp, latitude, longitude, stat=None):
+        """Cache the information of an image, replacing any previous
+        entry. Entries are written when the commit method is called.
+
+        Args:
+            path (str):
+                Filepath to the image.
+            timestamp (datetime):
+                When the image was taken, or None if unknown.
+            latitude (float):
+                Latitude of the image, or None if unknown.
+            longitude (float):
+                Longitude of the image, or None if unknown.
+
+        Kwargs:
+            stat (os.stat_result) --> None:
+                The result of os.stat for the image, if it is already
+                known. A value of None will call os.stat.
+        """
+
+        stat = os.stat(path) if stat is None else stat
+        if timestamp is not None:
+            timestamp = timestamp.isoformat()
+        self.connection.execute(
+            'INSERT OR REPLACE INTO metadata VALUES (?, ?, ?, ?, ?, ?)',
+            (os.path.abspath(path), stat.st_size, stat.st_mtime_ns,
+             timestamp, latitude, longitude),
+        )
+
+    def commit(self):
+        """Write any pending entries to the database."""
+
+        self.connection.commit()
+
+    def invalidate(self, paths=None):
+        """Remove entries from the cache so that their images are read
+        again.
+
+        Kwargs:
+            paths (list) --> None:
+                Filepaths of the images to remove. A value of None will
+                remove every entry.
+        """
+
+        if paths is None:
+            self.connection.execute('DELETE FROM metadata')
+        else:
+            self.connection.executemany(
+                'DELETE FROM metadata WHERE path = ?',
+                ((os.path.abspath(path),) for path in paths),
+            )
+        self.connection.commit()
+
+    def prune(self, keep=None):
+        """Remove the entries of images that no longer exist.
+
+        Kwargs:
+            keep (list/set) --> None:
+                Filepaths of the images whose entries should be kept,
+                removing every other entry. A value of None will
+                remove the entries of images that have been deleted.
+
+        Returns:
+            The number of entries that were removed.
+        """
+
+        paths = [path for path, in
+                 self.connection.execute('SELECT path FROM metadata')]
+        if keep is None:
+            removed = [path for path in paths if not os.path.isfile(path)]
+        else:
+            keep = {os.path.abspath(path) for path in keep}
+            removed = [path for path in paths if path not in keep]
+        self.invalidate(removed)
+        return len(removed)
+
+    def close(self):
+        """Commit any pending entries and close the database."""
+
+        self.connection.commit()
+        self.connection.close()
+
+    def __len__(self):
+        """Return the number of cached images."""
+
+        count, = self.connection.execute(
+            'SELECT COUNT(*) FROM metadata'
+        ).fetchone()
+        return count
+
+    def __enter__(self):
+        """Use the object as a context manager."""
+
+        return self
+
+    def __exit__(self, *exc_info):
+        """Commit any pending entries and close the database."""
+
+        self.close()
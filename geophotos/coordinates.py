@@ -0,0 +1,368 @@
+# -*- coding: utf-8 -*-
+
+"""
+geophotos.coordinates
+~~~~~~~~~~~~~~~~~~~~~
+
+Provides a compact, columnar container for coordinate data. Rather than
+storing each coordinate as a tuple, latitudes, longitudes and optional
+timestamps are each stored in a single contiguous array, which takes a
+fraction of the memory and allows the data to be processed in bulk.
+"""
+
+from array import array
+from datetime import datetime, timezone
+
+import numpy as np
+
+# Number of rows that are converted to tuples at a time when iterating
+_BLOCK_SIZE = 65536
+
+# How a missing timestamp (NaT) is stored, which sorts before every other
+_MISSING_TIMESTAMP = np.iinfo(np.int64).min
+
+
+def _to_milliseconds(moment):
+    '''Converts a moment in time to integer milliseconds since the epoch.
+
+    Args:
+        moment (int/str/datetime/datetime64):
+            Integer milliseconds since the epoch, an ISO 8601 string
+            such as '2019-03' or '2019-03-14T12:00', a datetime, a date
+            or a datetime64. Naive datetimes are treated as UTC, like
+            the stored timestamps, while aware ones are converted to
+            UTC.
+
+    Returns:
+        The number of milliseconds as an integer.
+    '''
+
+    if isinstance(moment, (int, np.integer)):
+        return int(moment)
+    if isinstance(moment, datetime) and moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return int(np.datetime64(moment, 'ms').astype(np.int64))
+
+
+class CoordinateArray:
+    """Columnar storage of latitudes, longitudes and, optionally,
+    timestamps.
+
+    Latitudes and longitudes are stored as float64 arrays, with missing
+    values stored as NaN. Timestamps are stored as int64 milliseconds
+    since the Unix epoch (UTC).
+
+    For compatibility with the rest of the library, the object behaves
+    like a list of (latitude, longitude) tuples when it is iterated over
+    or indexed with an integer. Slicing returns a view that shares
+    memory with the original, while indexing with a boolean mask or an
+    array of indices returns a filtered copy.
+
+    Coordinates that are sorted by their timestamps, which sort_by_time
+    takes care of, can be narrowed down to a window of time with a
+    binary search. See the between method.
+    """
+
+    __slots__ = ('latitudes', 'longitudes', 'timestamps', '_sorted')
+
+    def __init__(self, latitudes, longitudes, timestamps=None):
+        """Initializes the object. Arrays that already have the right
+        type are used as they are, without being copied.
+
+        Args:
+            latitudes (array-like):
+                The latitude of each coordinate.
+            longitudes (array-like):
+                The longitude of each coordinate.
+
+        Kwargs:
+            timestamps (array-like) --> None:
+                The timestamp of each coordinate, either as integer
+                milliseconds since the epoch or as datetime64 values.
+                A value of None will not store any timestamps.
+        """
+
+        self.latitudes = np.asarray(latitudes, dtype=np.float64)
+        self.longitudes = np.asarray(longitudes, dtype=np.float64)
+        if timestamps is not None:
+            timestamps = np.asarray(timestamps)
+            if np.issubdtype(timestamps.dtype, np.datetime64):
+                timestamps = timestamps.astype('datetime64[ms]')
+                timestamps = timestamps.view(np.int64)
+            timestamps = timestamps.astype(np.int64, copy=False)
+        self.timestamps = timestamps
+        # Whether the timestamps are in order, which is None until known
+        self._sorted = None
+
+        lengths = {len(self.latitudes), len(self.longitudes)}
+        if timestamps is not None:
+            lengths.add(len(timestamps))
+        if len(lengths) > 1:
+            raise ValueError('Every column must have the same length.')
+
+    @classmethod
+    def from_records(cls, records):
+        """Create an object from (latitude, longitude) or (timestamp,
+        latitude, longitude) records, such as those returned by
+        GeoPhotos.pull_coordinates. Missing values may be None.
+
+        Args:
+            records (iterable):
+                The records, which are consumed one at a time.
+
+        Returns:
+            A CoordinateArray of the records.
+        """
+
+        latitudes, longitudes, timestamps = array('d'), array('d'), []
+        nan = float('nan')
+        for record in records:
+            if len(record) == 3:
+                timestamp, latitude, longitude = record
+                timestamps.append(timestamp)
+            else:
+                latitude, longitude = record
+            latitudes.append(nan if latitude is None else latitude)
+            longitudes.append(nan if longitude is None else longitude)
+
+        if not timestamps:
+            timestamps = None
+        elif len(timestamps) != len(latitudes):
+            raise ValueError('Either every record or none must have a '
+                             'timestamp.')
+        else:
+            timestamps = np.array(timestamps, dtype='datetime64[ms]')
+        return cls(np.frombuffer(latitudes), np.frombuffer(longitudes),
+                   timestamps)
+
+    @classmethod
+    def concatenate(cls, arrays):
+        """Join CoordinateArrays end to end into a single one.
+
+        Args:
+            arrays (iterable):
+                The CoordinateArrays to join. Timestamps are only kept if
+                every one of them has timestamps.
+
+        Returns:
+            A new CoordinateArray of every coordinate.
+        """
+
+        arrays = list(arrays)
+        if not arrays:
+            return cls(np.empty(0), np.empty(0))
+        timestamps = None
+        if all(array.timestamps is not None for array in arrays):
+            timestamps = np.concatenate([array.timestamps for array in arrays])
+        return cls(np.concatenate([array.latitudes for array in arrays]),
+                   np.concatenate([array.longitudes for array in arrays]),
+                   timestamps)
+
+    @property
+    def datetimes(self):
+        """Returns the timestamps as a datetime64 array that shares
+        memory with them, or None if there are no timestamps."""
+
+        if self.timestamps is None:
+            return None
+        return self.timestamps.view('datetime64[ms]')
+
+    @property
+    def nbytes(self):
+        """Returns the number of bytes used by the columns."""
+
+        total = self.latitudes.nbytes + self.longitudes.nbytes
+        if self.timestamps is not None:
+            total += self.timestamps.nbytes
+        return total
+
+    @property
+    def is_time_sorted(self):
+        """Returns whether the coordinates are in chronological order.
+        This is checked the first time and then remembered, so the
+        columns shouldn't be modified in place afterwards."""
+
+        if self.timestamps is None:
+            return False
+        if self._sorted is None:
+            self._sorted = bool(np.all(self.timestamps[1:]
+                                       >= self.timestamps[:-1]))
+        return self._sorted
+
+    def sort_by_time(self):
+        """Sort the coordinates chronologically. Coordinates without a
+        timestamp are placed first, and ties keep their order.
+
+        Returns:
+            A CoordinateArray sorted by timestamp, which is the object
+            itself if it already was.
+        """
+
+        if self.timestamps is None:
+            raise ValueError('There are no timestamps to sort by.')
+        if self.is_time_sorted:
+            return self
+        result = self[np.argsort(self.timestamps, kind='stable')]
+        result._sorted = True
+        return result
+
+    def time_index(self, start=None, end=None):
+        """Find the coordinates from a window of time, which starts at
+        the start and ends just before the end. Coordinates without a
+        timestamp are never in the window.
+
+        The window is found with a binary search if the coordinates are
+        sorted chronologically, and by comparing every timestamp
+        otherwise.
+
+        Kwargs:
+            start (int/str/datetime/datetime64) --> None:
+                The beginning of the window. A value of None will start
+                at the earliest timestamp.
+                e.g. '2019-03', datetime(2019, 3, 14)
+            end (int/str/datetime/datetime64) --> None:
+                The end of the window, which is excluded from it. A
+                value of None will end after the latest timestamp.
+
+        Returns:
+            A slice if the coordinates are sorted, and a boolean mask
+            otherwise, either of which can index the columns.
+        """
+
+        if self.timestamps is None:
+            raise ValueError('There are no timestamps to select by.')
+        lower = _MISSING_TIMESTAMP + 1
+        if start is not None:
+            lower = max(_to_milliseconds(start), lower)
+
+        if self.is_time_sorted:
+            first = int(np.searchsorted(self.timestamps, lower, 'left'))
+            last = len(self)
+            if end is not None:
+                last = int(np.searchsorted(self.timestamps,
+                                           _to_milliseconds(end), 'left'))
+            return slice(first, max(first, last))
+
+        mask = self.timestamps >= lower
+        if end is not None:
+            mask &= self.timestamps < _to_milliseconds(end)
+        return mask
+
+    def between(self, start=None, end=None):
+        """Keep only the coordinates from a window of time. See the
+        time_index method.
+
+        Kwargs:
+            start (int/str/datetime/datetime64) --> None:
+                The beginning of the window.
+            end (int/str/datetime/datetime64) --> None:
+                The end of the window, which is excluded from it.
+
+        Returns:
+            A CoordinateArray of the coordinates in the window, which
+            shares memory with the original if it is sorted.
+        """
+
+        return self[self.time_index(start, end)]
+
+    def filter(self, mask):
+        """Keep only the coordinates that a boolean mask selects.
+
+        Args:
+            mask (array-like):
+                A boolean array with one value per coordinate.
+
+        Returns:
+            A new CoordinateArray of the selected coordinates.
+        """
+
+        return self[np.asarray(mask, dtype=bool)]
+
+    def dropna(self):
+        """Remove the coordinates with a missing latitude or longitude.
+
+        Returns:
+            A new CoordinateArray of the complete coordinates.
+        """
+
+        return self.filter(np.isfinite(self.latitudes)
+                           & np.isfinite(self.longitudes))
+
+    def iter_rows(self, include_timestamp=False):
+        """Iterate over the coordinates as tuples, converting a block of
+        them at a time.
+
+        Kwargs:
+            include_timestamp (bool) --> False:
+                Whether to yield (datetime, latitude, longitude) tuples
+                instead of (latitude, longitude) tuples.
+
+        Yields:
+            A tuple for each coordinate.
+        """
+
+        if include_timestamp and self.timestamps is None:
+            raise ValueError('There are no timestamps to include.')
+        for start in range(0, len(self), _BLOCK_SIZE):
+            stop = start + _BLOCK_SIZE
+            columns = [self.latitudes[start:stop].tolist(),
+                       self.longitudes[start:stop].tolist()]
+            if include_timestamp:
+                datetimes = self.datetimes[start:stop].astype(object)
+                columns.insert(0, datetimes.tolist())
+            yield from zip(*columns)
+
+    def to_list(self, include_timestamp=False):
+        """Convert the coordinates to a list of tuples. See iter_rows."""
+
+        return list(self.iter_rows(include_timestamp=include_timestamp))
+
+    def __len__(self):
+        """Return the number of coordinates."""
+
+        return len(self.latitudes)
+
+    def __iter__(self):
+        """Iterate over the coordinates as (latitude, longitude)
+        tuples."""
+
+        return self.iter_rows()
+
+    def __getitem__(self, key):
+        """Return a single (latitude, longitude) tuple for an integer,
+        and a CoordinateArray otherwise."""
+
+        if isinstance(key, (int, np.integer)):
+            return (self.latitudes[key].item(), self.longitudes[key].item())
+        timestamps = None if self.timestamps is None else self.timestamps[key]
+        result = CoordinateArray(self.latitudes[key], self.longitudes[key],
+                                 timestamps)
+        # Forward slices and masks keep sorted coordinates in order
+        if self._sorted and timestamps is not None:
+            if isinstance(key, slice):
+                result._sorted = (key.step or 1) > 0 or None
+            elif getattr(key, 'dtype', None) == bool:
+                result._sorted = True
+        return result
+
+    def __array__(self, dtype=None, copy=None):
+        """Return the coordinates as an (n, 2) array of latitudes and
+        longitudes."""
+
+        return np.column_stack([self.latitudes, self.longitudes]).astype(
+            dtype or np.float64, copy=False,
+        )
+
+    def __reduce__(self):
+        """Support pickling, which is used to send the coordinates to
+        other processes."""
+
+        return (CoordinateArray, (self.latitudes, self.longitudes,
+                                  self.timestamps))
+
+    def __repr__(self):
+        """Summarize the object."""
+
+        timestamps = 'with' if self.timestamps is not None else 'without'
+        return (f'<CoordinateArray of {len(self)} coordinates '
+                f'{timestamps} timestamps>')
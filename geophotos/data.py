@@ -12,13 +12,30 @@ either as a csv file or a returned object.
 
 import csv
 import json
+import re
+from array import array
 from datetime import datetime
+from itertools import islice
+from operator import itemgetter
 
-import pandas as pd
+import numpy as np
+
+from .coordinates import CoordinateArray
+from .storage import write_coordinates
+
+# Number of locations whose values are collected into columns at a time
+_BATCH_SIZE = 4096
+
+# Matches any character that isn't whitespace
+_NONSPACE = re.compile(r'\S')
+
+# Matches the delimiter after an element of an array, and the whitespace
+# around it
+_DELIMITER = re.compile(r'\s*([,\]])\s*')
 
 
 def coordinates_from_csv(filepath, latitude_column, longitude_column,
-                         delimiter=','):
+                         delimiter=',', columnar=False):
     '''Takes a path to a data file, and with it, pulls out the
     specified latitude and longitude columns. This data is then
     returned as a list of tuples.
@@ -34,52 +51,304 @@ def coordinates_from_csv(filepath, latitude_column, longitude_column,
     Kwargs:
         delimiter (str) --> ',':
             The delimiter that the csv file values are split by.
+        columnar (bool) --> False:
+            Whether to return the coordinates as a CoordinateArray
+            instead of a list of tuples. The file is then read in
+            chunks. See iter_csv_coordinates.
 
     Returns:
         A list of tuples which contain coordinate information in the
         form of: (latitude, longitude).
     '''
 
-    # Read the data file into a pandas dataframe
-    data = pd.read_csv(filepath, delimiter=delimiter)
+    if columnar:
+        return CoordinateArray.concatenate(iter_csv_coordinates(
+            filepath, latitude_column, longitude_column, delimiter=delimiter,
+        ))
+
+    import pandas as pd
+
+    # Read only the specified columns of the data file into a dataframe
+    names = _csv_column_names(filepath, delimiter,
+                              [latitude_column, longitude_column])
+    data = pd.read_csv(filepath, delimiter=delimiter, usecols=names)
     # Grab the specified columns and return as a list of tuples
-    latitudes = data.iloc[:, latitude_column-1]
-    longitudes = data.iloc[:, longitude_column-1]
+    latitudes = data[names[0]]
+    longitudes = data[names[1]]
     return list(zip(latitudes, longitudes))
 
 
-def _parse_google_takeout_json(filepath):
-    '''Parses the input Google Takeout Location History JSON file.
+def _csv_column_names(filepath, delimiter, columns):
+    '''Looks up the names of columns in the header of a csv file.
+
+    Args:
+        filepath (str):
+            Path to the data/csv file.
+        delimiter (str):
+            The delimiter that the csv file values are split by.
+        columns (list):
+            The numbers of the columns, starting from one.
+
+    Returns:
+        A list of the names of the columns.
+    '''
+
+    import pandas as pd
+
+    header = pd.read_csv(filepath, delimiter=delimiter, nrows=0).columns
+    return [header[column-1] for column in columns]
+
+
+def iter_csv_coordinates(filepath, latitude_column, longitude_column,
+                         timestamp_column=None, delimiter=',',
+                         chunk_size=100000):
+    '''Reads the coordinates of a data file a chunk of rows at a time,
+    so that the memory used doesn't depend on the size of the file.
+    Only the specified columns are read, and the coordinates are parsed
+    straight into floats.
+
+    Args:
+        filepath (str):
+            Path to the data/csv file.
+        latitude_column (int):
+            Column of the data file that holds latitude information.
+        longitude_column (int):
+            Column of the data file that holds longitude information.
+
+    Kwargs:
+        timestamp_column (int) --> None:
+            Column of the data file that holds timestamps, such as those
+            written by csv_from_google_takeout_json. A value of None
+            will not read any timestamps.
+        delimiter (str) --> ',':
+            The delimiter that the csv file values are split by.
+        chunk_size (int) --> 100000:
+            The number of rows to read at a time.
+
+    Yields:
+        A CoordinateArray for each chunk of rows. Missing values are
+        NaN.
+    '''
+
+    import pandas as pd
+
+    columns = [latitude_column, longitude_column]
+    if timestamp_column is not None:
+        columns.append(timestamp_column)
+    names = _csv_column_names(filepath, delimiter, columns)
+    dtypes = {names[0]: np.float64, names[1]: np.float64}
+    if timestamp_column is not None:
+        dtypes[names[2]] = str
+    reader = pd.read_csv(filepath, delimiter=delimiter, usecols=names,
+                         dtype=dtypes, chunksize=chunk_size)
+    with reader:
+        for chunk in reader:
+            timestamps = None
+            if timestamp_column is not None:
+                timestamps = pd.to_datetime(chunk[names[2]])
+                timestamps = timestamps.to_numpy(dtype='datetime64[ms]')
+            yield CoordinateArray(chunk[names[0]].to_numpy(),
+                                  chunk[names[1]].to_numpy(), timestamps)
+
+
+def _iter_json_array(filepath, key, chunk_size=65536):
+    '''Incrementally parses a JSON file whose top level is an object,
+    yielding the elements of one of its arrays one at a time. Only a
+    single element and a chunk of the file are held in memory at once.
+
+    Args:
+        filepath (str):
+            The location of the JSON file.
+        key (str):
+            The key of the top level array to iterate over.
+
+    Kwargs:
+        chunk_size (int) --> 65536:
+            The number of characters to read from the file at a time.
+
+    Yields:
+        Each decoded element of the array.
+    '''
+
+    decoder = json.JSONDecoder()
+    scan = decoder.scan_once
+    with open(filepath, 'r') as stream:
+        buffer, position, finished = '', 0, False
+
+        def fill():
+            # Drop the consumed part of the buffer and read more of the
+            # file, returning False once there is nothing left to read
+            nonlocal buffer, position, finished
+            chunk = stream.read(chunk_size)
+            buffer, position = buffer[position:] + chunk, 0
+            finished = not chunk
+            return not finished
+
+        def peek():
+            # Skip whitespace and return the next character
+            nonlocal position
+            while True:
+                following = _NONSPACE.search(buffer, position)
+                if following is not None:
+                    position = following.start()
+                    return following.group()
+                position = len(buffer)
+                if not fill():
+                    raise ValueError('Unexpected end of JSON file.')
+
+        def expect(characters):
+            # Consume the next character, which must be one of the given
+            nonlocal position
+            character = peek()
+            if character not in characters:
+                raise ValueError(f'Unexpected {character!r} in JSON file.')
+            position += 1
+            return character
+
+        def decode():
+            # Decode the next value, reading more of the file as long as
+            # the value is incomplete
+            nonlocal position
+            peek()
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    if not fill():
+                        raise
+                    continue
+                # A number at the end of the buffer may have been cut
+                # short, which is ruled out by the delimiter after it
+                following = _NONSPACE.search(buffer, end)
+                if not finished and (following is None or
+                                     following.group() not in ',:]}'):
+                    fill()
+                    continue
+                position = end
+                return value
+
+        expect('{')
+        if peek() == '}':
+            return
+        while True:
+            name = decode()
+            expect(':')
+            if name != key:
+                # Other values are decoded only to be skipped over
+                decode()
+            else:
+                expect('[')
+                if peek() == ']':
+                    return
+                # Elements are decoded back to back with the decoder's
+                # scanner, which is the hot loop of large files
+                while True:
+                    try:
+                        value, end = scan(buffer, position)
+                        delimiter = _DELIMITER.match(buffer, end)
+                    except (StopIteration, json.JSONDecodeError):
+                        delimiter = None
+                    # The element or its delimiter may continue past the
+                    # end of the buffer, so read more of it and try again
+                    if delimiter is None or (delimiter.end() == len(buffer)
+                                             and not finished):
+                        if not fill():
+                            # Report the error at the element's start
+                            decoder.raw_decode(buffer, position)
+                            raise ValueError('Unexpected end of JSON file.')
+                        continue
+                    yield value
+                    position = delimiter.end()
+                    if delimiter.group(1) == ']':
+                        return
+            if expect(',}') == '}':
+                return
+
+
+def iter_google_takeout_json(filepath):
+    '''Parses the input Google Takeout Location History JSON file one
+    location at a time, using a constant amount of memory regardless
+    of the size of the file.
     
     Args:
         filepath (str):
             The location of the Google Takeout Location History JSON
             file.
 
-    Returns:
-        A list of tuples which contain coordinate information in the
-        form of: (timestamp, latitude, longitude).
+    Yields:
+        Tuples which contain coordinate information in the form of:
+        (timestamp, latitude, longitude).
     '''
 
-    # Load the json file and parse the location information
-    with open(filepath, 'r') as takeout_json:
-        data = json.load(takeout_json)
-    locations = data['locations']
-
-    # Iteratate through each location to get coordinate information
-    information = []
-    for _, location in enumerate(locations):
+    for location in _iter_json_array(filepath, 'locations'):
         # Convert time in milliseconds to seconds, then to a UTC timestamp
         seconds = int(location['timestampMs']) / 1000
         timestamp = datetime.utcfromtimestamp(seconds)
         # Convert the latitude and longitudes to a readable format
         latitude = float(location['latitudeE7']) / 1e7
         longitude = float(location['longitudeE7']) / 1e7
-        # Write the coordinates to the information list
-        row = (timestamp, latitude, longitude)
-        information.append(row)
+        yield (timestamp, latitude, longitude)
+
+
+def _decode_google_takeout_json(filepath):
+    '''Parses the input Google Takeout Location History JSON file into
+    columns. The raw values of each location are only collected while
+    the file is parsed, and are then all converted at once.
+    
+    Args:
+        filepath (str):
+            The location of the Google Takeout Location History JSON
+            file.
+
+    Returns:
+        A CoordinateArray of the timestamps, latitudes and longitudes.
+    '''
+
+    # Pull each column out of a batch of locations at a time, which
+    # keeps the loops over the locations out of Python code
+    timestamps, latitudes, longitudes = array('q'), array('q'), array('q')
+    locations = _iter_json_array(filepath, 'locations')
+    while True:
+        batch = list(islice(locations, _BATCH_SIZE))
+        if not batch:
+            break
+        # The timestamps are stored as strings
+        timestamps.extend(map(int, map(itemgetter('timestampMs'), batch)))
+        latitudes.extend(map(itemgetter('latitudeE7'), batch))
+        longitudes.extend(map(itemgetter('longitudeE7'), batch))
+
+    # Convert every value in a single pass over each column
+    timestamps = np.frombuffer(timestamps, dtype=np.int64)
+    latitudes = np.frombuffer(latitudes, dtype=np.int64) / 1e7
+    longitudes = np.frombuffer(longitudes, dtype=np.int64) / 1e7
+    return CoordinateArray(latitudes, longitudes, timestamps)
+
+
+def _parse_google_takeout_json(filepath, columnar=False):
+    '''Parses the input Google Takeout Location History JSON file.
     
-    return information
+    Args:
+        filepath (str):
+            The location of the Google Takeout Location History JSON
+            file.
+
+    Kwargs:
+        columnar (bool) --> False:
+            Whether to decode the file in bulk and return its
+            information as a CoordinateArray, which is faster and
+            takes a fraction of the memory for large files. See the
+            parse_takeout_json benchmarks.
+
+    Returns:
+        A list of tuples which contain coordinate information in the
+        form of: (timestamp, latitude, longitude). If columnar is True,
+        a CoordinateArray with the timestamps as int64 milliseconds
+        since the epoch is returned instead.
+    '''
+
+    if columnar:
+        return _decode_google_takeout_json(filepath)
+    return list(iter_google_takeout_json(filepath))
 
 
 def csv_from_google_takeout_json(filepath, destination):
@@ -95,8 +364,8 @@ def csv_from_google_takeout_json(filepath, destination):
             Where to save the output csv file.
     '''
 
-    # Get the coordinate information from the input file
-    information = _parse_google_takeout_json(filepath)
+    # Stream the coordinate information from the input file
+    information = iter_google_takeout_json(filepath)
     # If a filepath was specified, instantiate the csv writer
     with open(destination, 'w') as output:
         writer = csv.writer(output, delimiter=',')
@@ -106,7 +375,30 @@ def csv_from_google_takeout_json(filepath, destination):
         writer.writerows(information)
 
 
-def coordinates_from_google_takeout_json(filepath):
+def binary_from_google_takeout_json(filepath, destination, compress=False):
+    '''Converts the information stored in a Google Takeout Location
+    History JSON file to a binary .parquet or .npz file with three
+    columns: timestamp, latitude, and longitude. Such a file is much
+    faster to read back than a csv file. See read_coordinates.
+    
+    Args:
+        filepath (str):
+            The location of the Google Takeout Location History JSON
+            file.
+        destination (str):
+            Where to save the output file. Its extension determines its
+            format.
+
+    Kwargs:
+        compress (bool) --> False:
+            Whether to compress the columns. See write_coordinates.
+    '''
+
+    information = _decode_google_takeout_json(filepath)
+    write_coordinates(destination, information, compress=compress)
+
+
+def coordinates_from_google_takeout_json(filepath, columnar=False):
     '''Takes a path to a Google Takeout Location History JSON file,
     and with it, pulls the coordinates. This data is then returned as
     a list of tuples.
@@ -116,13 +408,21 @@ def coordinates_from_google_takeout_json(filepath):
             The location of the Google Takeout Location History JSON
             file.
 
+    Kwargs:
+        columnar (bool) --> False:
+            Whether to return the coordinates as a CoordinateArray
+            instead of a list of tuples. The timestamps are kept in
+            this case, since they take little extra memory.
+
     Returns:
         A list of tuples which contain coordinate information in the
         form of: (latitude, longitude).
     '''
 
+    if columnar:
+        return _decode_google_takeout_json(filepath)
     # Get the coordinate information from the input file
-    information = _parse_google_takeout_json(filepath)
+    information = iter_google_takeout_json(filepath)
     # Remove timestamp column for synergy with other geophotos functions
     return [(info[1], info[2]) for info in information]
 
@@ -0,0 +1,334 @@
+# -*- coding: utf-8 -*-
+
+"""
+geophotos.exif
+~~~~~~~~~~~~~~
+
+Reads the timestamp and GPS information of images straight from their
+headers, without decoding the images or reading the rest of their exif
+data. JPEG, TIFF and HEIC/HEIF images are supported.
+
+Every read is small and bounded, and every file is closed before the
+functions return, which makes this far cheaper than opening each image
+with Pillow when only the coordinates of a large library are needed.
+"""
+
+import struct
+
+# Tags of the first image file directory (IFD) that are read
+_DATETIME_TAG = 0x0132
+_GPS_IFD_TAG = 0x8825
+
+# Sizes in bytes of each TIFF field type, by type number
+_TYPE_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 6: 1, 7: 1, 8: 2, 9: 4, 10: 8}
+
+# Limits that bound how much of a malformed or unusual file is read
+_MAX_ENTRIES = 512
+_MAX_VALUE_SIZE = 1024
+_MAX_SEGMENTS = 64
+_MAX_BOXES = 64
+_MAX_META_SIZE = 4 * 1024 * 1024
+
+# File signatures of each supported format
+_JPEG_SIGNATURE = b'\xff\xd8'
+_TIFF_SIGNATURES = (b'II*\x00', b'MM\x00*')
+_HEIF_BRANDS = (b'heic', b'heix', b'heim', b'heis', b'hevc', b'hevx',
+                b'mif1', b'msf1', b'avif')
+
+
+def _read(stream, size):
+    '''Reads exactly the given number of bytes from a stream.
+
+    Raises:
+        ValueError: If the stream ends first.
+    '''
+
+    data = stream.read(size)
+    if len(data) != size:
+        raise ValueError('Unexpected end of file.')
+    return data
+
+
+def _read_value(stream, base, order, field_type, count, raw):
+    '''Decodes the value of a single IFD entry.
+
+    Args:
+        stream (file):
+            The open image file.
+        base (int):
+            Position of the TIFF header in the file, which every offset
+            is relative to.
+        order (str):
+            The struct byte order character of the TIFF data.
+        field_type (int):
+            The TIFF field type of the entry.
+        count (int):
+            The number of values of the entry.
+        raw (bytes):
+            The four value/offset bytes of the entry.
+
+    Returns:
+        The decoded value, in the same form as Pillow's legacy exif
+        values, or None if the entry's type is not supported or its
+        value is too large to be worth reading.
+    '''
+
+    size = _TYPE_SIZES.get(field_type, 0) * count
+    if not size or size > _MAX_VALUE_SIZE:
+        return None
+    if size <= 4:
+        data = raw[:size]
+    else:
+        offset, = struct.unpack(order + 'L', raw)
+        stream.seek(base + offset)
+        data = _read(stream, size)
+
+    if field_type == 2:
+        return data.split(b'\x00', 1)[0].decode('ascii', 'replace')
+    if field_type in (1, 7):
+        return data if count > 1 else data[0]
+    if field_type in (5, 10):
+        code = 'L' if field_type == 5 else 'l'
+        numbers = struct.unpack(f'{order}{2 * count}{code}', data)
+        values = tuple(zip(numbers[::2], numbers[1::2]))
+    else:
+        code = {3: 'H', 4: 'L', 6: 'b', 8: 'h', 9: 'l'}[field_type]
+        values = struct.unpack(f'{order}{count}{code}', data)
+    return values if count > 1 else values[0]
+
+
+def _read_ifd(stream, base, order, offset):
+    '''Reads the entries of an image file directory (IFD).
+
+    Returns:
+        A list of (tag, field_type, count, raw) tuples.
+    '''
+
+    stream.seek(base + offset)
+    count, = struct.unpack(order + 'H', _read(stream, 2))
+    if count > _MAX_ENTRIES:
+        raise ValueError('Too many entries in image file directory.')
+    data = _read(stream, 12 * count)
+    return [struct.unpack(order + 'HHL4s', data[i:i+12])
+            for i in range(0, len(data), 12)]
+
+
+def _parse_tiff(stream, base):
+    '''Reads the timestamp and GPS information from TIFF data, which is
+    also how the exif data of JPEG and HEIF images is stored.
+
+    Args:
+        stream (file):
+            The open image file.
+        base (int):
+            Position of the TIFF header in the file.
+
+    Returns:
+        A dictionary that holds the 'DateTime' and 'GPSInfo' exif data
+        of the image, if present.
+    '''
+
+    stream.seek(base)
+    header = _read(stream, 8)
+    if header[:4] not in _TIFF_SIGNATURES:
+        raise ValueError('Invalid TIFF header.')
+    order = '<' if header[:2] == b'II' else '>'
+    first, = struct.unpack(order + 'L', header[4:])
+
+    exif_data = dict()
+    gps_offset = None
+    for tag, field_type, count, raw in _read_ifd(stream, base, order, first):
+        if tag == _DATETIME_TAG:
+            exif_data['DateTime'] = _read_value(stream, base, order,
+                                                field_type, count, raw)
+        elif tag == _GPS_IFD_TAG:
+            gps_offset, = struct.unpack(order + 'L', raw)
+
+    if gps_offset is not None:
+        from PIL.ExifTags import GPSTAGS
+
+        gps = dict()
+        for entry in _read_ifd(stream, base, order, gps_offset):
+            tag, field_type, count, raw = entry
+            value = _read_value(stream, base, order, field_type, count, raw)
+            if value is not None:
+                gps[GPSTAGS.get(tag, tag)] = value
+        exif_data['GPSInfo'] = gps
+    return exif_data
+
+
+def _find_jpeg_exif(stream):
+    '''Finds the TIFF data of the APP1 exif segment of a JPEG image,
+    stopping at the start of the image data.
+
+    Returns:
+        The position of the TIFF header, or None if there isn't one.
+    '''
+
+    stream.seek(2)
+    for _ in range(_MAX_SEGMENTS):
+        marker = _read(stream, 2)
+        if marker[0] != 0xFF:
+            raise ValueError('Invalid JPEG marker.')
+        # Start of scan or end of image, so there are no more headers
+        if marker[1] in (0xD9, 0xDA):
+            return None
+        length, = struct.unpack('>H', _read(stream, 2))
+        start = stream.tell()
+        if marker[1] == 0xE1 and stream.read(6) == b'Exif\x00\x00':
+            return start + 6
+        stream.seek(start + length - 2)
+    return None
+
+
+def _iter_boxes(data, start=0, end=None):
+    '''Iterates over the ISO base media file format boxes in a buffer.
+
+    Yields:
+        A tuple of each box's type, and the start and end of its data.
+    '''
+
+    end = len(data) if end is None else end
+    position = start
+    while position + 8 <= end:
+        size, kind = struct.unpack('>L4s', data[position:position+8])
+        header = 8
+        if size == 1:
+            size, = struct.unpack('>Q', data[position+8:position+16])
+            header = 16
+        elif size == 0:
+            size = end - position
+        if size < header or position + size > end:
+            raise ValueError('Invalid box size.')
+        yield kind, position + header, position + size
+        position += size
+
+
+def _find_heif_exif(stream):
+    '''Finds the TIFF data of the exif item of a HEIF image.
+
+    Returns:
+        The position of the TIFF header, or None if there isn't one.
+    '''
+
+    # Find the top level meta box without reading any of the others
+    stream.seek(0)
+    meta = None
+    for _ in range(_MAX_BOXES):
+        header = stream.read(8)
+        if len(header) < 8:
+            return None
+        size, kind = struct.unpack('>L4s', header)
+        if size == 1:
+            size, = struct.unpack('>Q', _read(stream, 8))
+            size -= 8
+        if size < 8:
+            return None
+        if kind == b'meta':
+            if size > _MAX_META_SIZE:
+                raise ValueError('Meta box is too large.')
+            meta = _read(stream, size - 8)
+            break
+        stream.seek(size - 8, 1)
+    if meta is None:
+        return None
+
+    # The meta box is a full box, with four bytes of version and flags
+    children = {kind: (start, end)
+                for kind, start, end in _iter_boxes(meta, 4)}
+    if b'iinf' not in children or b'iloc' not in children:
+        return None
+
+    # Find the ID of the exif item in the item information box
+    start, end = children[b'iinf']
+    version = meta[start]
+    item = None
+    offset = start + (6 if version == 0 else 8)
+    for kind, box_start, _ in _iter_boxes(meta, offset, end):
+        if kind != b'infe' or meta[box_start] < 2:
+            continue
+        if meta[box_start] == 2:
+            item_id, = struct.unpack('>H', meta[box_start+4:box_start+6])
+            item_type = meta[box_start+8:box_start+12]
+        else:
+            item_id, = struct.unpack('>L', meta[box_start+4:box_start+8])
+            item_type = meta[box_start+10:box_start+14]
+        if item_type == b'Exif':
+            item = item_id
+            break
+    if item is None:
+        return None
+
+    # Find where the exif item is stored in the item location box
+    start, end = children[b'iloc']
+    version = meta[start]
+    sizes = meta[start+4:start+6]
+    offset_size, length_size = sizes[0] >> 4, sizes[0] & 0x0F
+    base_offset_size = sizes[1] >> 4
+    index_size = sizes[1] & 0x0F if version in (1, 2) else 0
+    position = start + 6
+
+    def take(size):
+        nonlocal position
+        if position + size > end:
+            raise ValueError('Invalid item location box.')
+        value = int.from_bytes(meta[position:position+size], 'big')
+        position += size
+        return value
+
+    count = take(2 if version < 2 else 4)
+    for _ in range(count):
+        item_id = take(2 if version < 2 else 4)
+        method = take(2) & 0x0F if version in (1, 2) else 0
+        take(2)
+        base_offset = take(base_offset_size)
+        extents = [(take(index_size), take(offset_size), take(length_size))
+                   for _ in range(take(2))]
+        if item_id != item:
+            continue
+        # Only items stored directly in the file can be read
+        if method != 0 or not extents:
+            return None
+        location = base_offset + extents[0][1]
+        stream.seek(location)
+        header_offset, = struct.unpack('>L', _read(stream, 4))
+        return location + 4 + header_offset
+    return None
+
+
+def read_gps_exif(location):
+    '''Reads only the timestamp and GPS information of an image.
+
+    Example usage:
+    >>> read_gps_exif('photo.jpg')
+    {'DateTime': '2019:03:14 12:00:00',
+     'GPSInfo': {'GPSLatitudeRef': 'N',
+                 'GPSLatitude': ((43, 1), (6, 1), (23400, 1000)), ...}}
+
+    Args:
+        location (str):
+            Filepath to the image.
+
+    Returns:
+        A dictionary in the same form as GeoPhotos.pull_exif, but with
+        only the 'DateTime' and 'GPSInfo' exif data. A value of None is
+        returned if the image is not in a supported format.
+
+    Raises:
+        ValueError: If the image's headers are malformed.
+    '''
+
+    with open(location, 'rb') as stream:
+        signature = stream.read(12)
+        try:
+            if signature[:2] == _JPEG_SIGNATURE:
+                base = _find_jpeg_exif(stream)
+            elif signature[:4] in _TIFF_SIGNATURES:
+                base = 0
+            elif signature[4:8] == b'ftyp' and signature[8:12] in _HEIF_BRANDS:
+                base = _find_heif_exif(stream)
+            else:
+                return None
+            return _parse_tiff(stream, base) if base is not None else dict()
+        except struct.error as error:
+            raise ValueError(f'Malformed image headers: {error}') from error
@@ -17,38 +17,91 @@ them on a map.
 
 import csv
 import glob
+import importlib
 import os
 import sys
+import time
 import webbrowser
+from collections import namedtuple
+from concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor,
+                                ThreadPoolExecutor, wait)
 from datetime import datetime
+from functools import partial
+from itertools import islice
 
-import folium
-import pandas as pd
-import requests
-from folium.plugins import HeatMap
-from PIL import Image
-from PIL.ExifTags import GPSTAGS, TAGS
+from .cache import MetadataCache
+from .coordinates import CoordinateArray
+from .data import coordinates_from_csv
+from .scan import iter_images
+from .storage import write_coordinates
+from .exif import read_gps_exif
 
-# Geopandas is an optional dependency
-try:
-    import geopandas as gpd
-except ImportError:
-    pass
+
+# A snapshot of the progress of GeoPhotos.iter_metadata, where the rate
+# is the number of images completed per second
+Progress = namedtuple('Progress', ['completed', 'total', 'elapsed', 'rate'])
+
+
+def print_progress(progress):
+    '''Prints a Progress snapshot on a single, continuously updated line
+    of the standard error stream. Can be passed as the progress argument
+    of GeoPhotos.iter_metadata and GeoPhotos.pull_metadata.'''
+
+    end = '\n' if progress.completed == progress.total else ''
+    print(f'\r{progress.completed}/{progress.total} images '
+          f'({progress.rate:.1f} images/s)', end=end, file=sys.stderr)
+
+
+def _read_exif(location, fast=False):
+    '''Pulls exif data from an image. See GeoPhotos.pull_exif, which
+    this function exists separately from so that it can be sent to
+    other processes.'''
+
+    # Images that can't be read from their headers alone are decoded
+    if fast:
+        try:
+            exif_data = read_gps_exif(location)
+        except ValueError:
+            exif_data = None
+        if exif_data is not None:
+            return exif_data
+
+    from PIL import Image
+    from PIL.ExifTags import GPSTAGS, TAGS
+
+    with Image.open(location) as image:
+        info = image._getexif()
+    
+    exif_data = dict()
+    if info:
+        for key, value in info.items():
+            name = TAGS.get(key, key)
+            if name == 'GPSInfo':
+                gps = dict()
+                for subvalue in value:
+                    nested = GPSTAGS.get(subvalue, subvalue)
+                    gps[nested] = value[subvalue]
+                exif_data[name] = gps
+            else:
+                exif_data[name] = value
+    return exif_data
 
 
 def requires_geopandas(original):
     '''This function is a decorator that will raise an ImportError
-    if geopandas has not been imported due to it being an optional
-    dependency.'''
+    if geopandas can't be imported due to it being an optional
+    dependency. Geopandas is only imported once the decorated function
+    is first called.'''
     
     def wrapper(*args, **kwargs):
-        # Call the function if geopandas has been imported
-        if 'geopandas' in sys.modules:
-            return original(*args, **kwargs)
+        # Call the function if geopandas can be imported
+        try:
+            importlib.import_module('geopandas')
         # Otherwise, raise an ImportError
-        else:
+        except ImportError:
             name = original.__name__
             raise ImportError(f'GeoPandas is required to use {name}.')
+        return original(*args, **kwargs)
     return wrapper
 
 
@@ -88,7 +141,7 @@ class GeoPhotos:
 
         self._images = set()
 
-    def feed(self, images):
+    def feed(self, images, recursive=True, extensions=None, workers=None):
         """Store one or more image filepaths in the instance for ease
         of use.
         
@@ -98,44 +151,80 @@ class GeoPhotos:
                 string is passed in, and the filepath leads to an
                 image, the filepath will be added. However, if the
                 filepath leads to a directory, the directory will be
-                searched for images (not yet implemented). Otherwise,
-                multiple filepaths can be passed in as either a list or
-                a tuple.
+                searched for images. Otherwise, multiple filepaths can
+                be passed in as either a list or a tuple.
+
+        Kwargs:
+            recursive (bool) --> True:
+                Whether or not to search the subdirectories of
+                directories as well.
+            extensions (iterable) --> None:
+                The file extensions of the images to find in
+                directories. A value of None will use the extensions
+                in geophotos.scan.IMAGE_EXTENSIONS.
+            workers (int) --> None:
+                The number of threads to search directories with. See
+                the iter_images function.
         """
 
         if isinstance(images, str):
-            if os.path.isfile(images):
-                self._images.add(images)
-            elif os.path.isdir(images):
-                pass # in the future, use glob
-                raise ValueError('A directory can not be fed.')
-        elif isinstance(images, list) or isinstance(images, tuple):
-            for item in images:
-                if os.path.isfile(item):
-                    self._images.add(item)
-
-    def find(self, pathname, recursive=None, feed=False):
+            images = [images]
+        elif not isinstance(images, (list, tuple)):
+            return
+        for item in images:
+            if os.path.isfile(item):
+                self._images.add(item)
+            elif os.path.isdir(item):
+                # Add the images as they're found instead of listing
+                # them all first
+                self._images.update(iter_images(
+                    item, extensions=extensions, recursive=recursive,
+                    workers=workers,
+                ))
+
+    def find(self, pathname, recursive=None, feed=False, extensions=None,
+             workers=None):
         """Search and compile a list of image filepaths in a specified
         directory.
         
         Args:
             pathname (str):
-                The filepath of the directory to search for images.
+                The filepath of the directory to search for images, or
+                a glob pattern of the image filepaths.
         
         Kwargs:
             recursive (None/bool) --> None:
                 Whether or not to look deeper than the immediately
                 specified path. See the glob library documentation.
-                A value of None will decide this automatically.
+                A value of None will decide this automatically, and
+                will search the subdirectories of a directory.
             feed (bool) --> False:
                 Whether or not to feed (store) the image filepaths
                 directly to the instance instead of returning them.
+            extensions (iterable) --> None:
+                The file extensions of the images to find in a
+                directory. A value of None will use the extensions in
+                geophotos.scan.IMAGE_EXTENSIONS.
+            workers (int) --> None:
+                The number of threads to search a directory with. See
+                the iter_images function.
         
         Returns:
             The list of filepaths if the user does not want to feed
             it directly to the instance.
         """
 
+        if os.path.isdir(pathname):
+            filepaths = iter_images(
+                pathname, extensions=extensions,
+                recursive=recursive is None or recursive, workers=workers,
+            )
+            if feed:
+                # The images found are already known to be files
+                self._images.update(filepaths)
+                return
+            return list(filepaths)
+
         if recursive is None:
             if '**' in pathname:
                 recursive = True
@@ -165,44 +254,142 @@ class GeoPhotos:
         seconds = float(value[2][0]) / float(value[2][1])
         return degrees + (minutes/60) + (seconds/3600)
 
-    def pull_metadata(self):
+    def pull_metadata(self, workers=None, executor='thread', progress=None,
+                      fast=False):
         """Pull exif data for all stored images.
+
+        Kwargs:
+            workers (int) --> None:
+                The number of threads or processes to pull the exif
+                data with. A value of None will pull the exif data of
+                one image at a time in the current thread.
+            executor (str) --> 'thread':
+                Either 'thread' or 'process'. Threads suit images on
+                slow or network storage, while processes suit images
+                that are slow to decode.
+            progress (callable) --> None:
+                Called with a Progress snapshot after each image. See
+                the print_progress function for an example.
+            fast (bool) --> False:
+                Read only the timestamp and GPS information from the
+                headers of the images. See the pull_exif method.
         
         Returns:
-            A list of image metadata dictionaries."""
+            A list of image metadata dictionaries, in the same order
+            as the stored image filepaths."""
+
+        metadata = self.iter_metadata(workers=workers, executor=executor,
+                                      progress=progress, fast=fast)
+        if not workers or workers <= 1:
+            return [exif for _, exif in metadata]
+        metadata = dict(metadata)
+        return [metadata[filepath] for filepath in self._images]
 
-        return [self.pull_exif(filepath) for filepath in self._images]
+    def iter_metadata(self, workers=None, executor='thread', progress=None,
+                      fast=False):
+        """Pull exif data for all stored images, one image at a time.
+
+        Images are handed to the workers a few at a time, so that no
+        more than a handful of results are ever held in memory at once.
+
+        Kwargs:
+            workers (int) --> None:
+                The number of threads or processes to pull the exif
+                data with. A value of None will pull the exif data of
+                one image at a time in the current thread.
+            executor (str) --> 'thread':
+                Either 'thread' or 'process'. See pull_metadata.
+            progress (callable) --> None:
+                Called with a Progress snapshot after each image.
+            fast (bool) --> False:
+                Read only the timestamp and GPS information from the
+                headers of the images. See the pull_exif method.
+
+        Yields:
+            A tuple of the image filepath and its exif data, in the
+            order that the images are completed.
+        """
 
-    def pull_exif(self, location):
+        return self._iter_exif(list(self._images), workers=workers,
+                               executor=executor, progress=progress,
+                               fast=fast)
+
+    def _iter_exif(self, filepaths, workers=None, executor='thread',
+                   progress=None, fast=False):
+        """Pull exif data for a list of images, one image at a time.
+        See iter_metadata, which pulls it for all stored images."""
+
+        total = len(filepaths)
+        start = time.perf_counter()
+
+        def report(completed):
+            if progress is not None:
+                elapsed = time.perf_counter() - start
+                rate = completed / elapsed if elapsed > 0 else 0.0
+                progress(Progress(completed, total, elapsed, rate))
+
+        if not workers or workers <= 1:
+            for completed, filepath in enumerate(filepaths, start=1):
+                exif = self.pull_exif(filepath, fast=fast)
+                report(completed)
+                yield filepath, exif
+            return
+
+        if executor == 'thread':
+            pool_class = ThreadPoolExecutor
+            function = partial(self.pull_exif, fast=fast)
+        elif executor == 'process':
+            pool_class = ProcessPoolExecutor
+            function = partial(_read_exif, fast=fast)
+        else:
+            raise ValueError("Executor must be either 'thread' or 'process'.")
+
+        remaining = iter(filepaths)
+        with pool_class(max_workers=workers) as pool:
+            # Keep a bounded number of images in flight, topping them up
+            # each time that one is completed
+            pending = {pool.submit(function, filepath): filepath
+                       for filepath in islice(remaining, workers * 4)}
+            completed = 0
+            try:
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        filepath = pending.pop(future)
+                        for queued in islice(remaining, 1):
+                            pending[pool.submit(function, queued)] = queued
+                        completed += 1
+                        report(completed)
+                        yield filepath, future.result()
+            finally:
+                # Don't wait on images that will never be asked for
+                for future in pending:
+                    future.cancel()
+
+    def pull_exif(self, location, fast=False):
         """Pull exif data from an image.
         
         Args:
             location (str):
                 Filepath to the image.
+
+        Kwargs:
+            fast (bool) --> False:
+                Read only the timestamp and GPS information straight
+                from the headers of JPEG, TIFF and HEIC images, without
+                decoding them. Other images, and images whose headers
+                can't be read, fall back to being decoded.
                 
         Returns:
             Exif data of the image.
         """
 
-        image = Image.open(location)
-        
-        exif_data = dict()
-        info = image._getexif()
-        if info:
-            for key, value in info.items():
-                name = TAGS.get(key, key)
-                if name == 'GPSInfo':
-                    gps = dict()
-                    for subvalue in value:
-                        nested = GPSTAGS.get(subvalue, subvalue)
-                        gps[nested] = value[subvalue]
-                    exif_data[name] = gps
-                else:
-                    exif_data[name] = value
-        return exif_data
+        return _read_exif(location, fast=fast)
 
     def pull_coordinates(self, metadata=None, include_timestamp=True,
-                         as_list=False, sort=True):
+                         as_list=False, sort=True, cache=None,
+                         columnar=False, workers=None, executor='thread',
+                         fast=False):
         """Pull coordinate data from images.
         
         Kwargs:
@@ -219,25 +406,124 @@ class GeoPhotos:
                 tuple.
             sort (bool) --> True:
                 Whether or not to sort the coordinates chronologically
-                before returning.
+                before returning. A sorted CoordinateArray can be
+                narrowed down to a window of time with its between
+                method.
+            cache (None/str/MetadataCache) --> None:
+                A MetadataCache, or the filepath of one, to keep the
+                coordinates of the stored images in between runs. Only
+                images that are new or have changed since the last run
+                are read. Not used if metadata is passed in.
+            columnar (bool) --> False:
+                Whether to return the coordinate data as a
+                CoordinateArray, in which case missing values are NaN
+                and the as_list argument is ignored.
+            workers (int) --> None:
+                The number of threads or processes to pull the exif
+                data with, if metadata isn't passed in. See the
+                pull_metadata method.
+            executor (str) --> 'thread':
+                Either 'thread' or 'process'. See pull_metadata.
+            fast (bool) --> False:
+                Read only the timestamp and GPS information from the
+                headers of the images, if metadata isn't passed in. See
+                the pull_exif method.
 
         Returns:
             Coordinate data, either in the form of a list or a tuple.
         """
 
-        if metadata is None:
-            metadata = self.pull_metadata()
+        options = {'workers': workers, 'executor': executor, 'fast': fast}
+        if metadata is None and cache is not None:
+            rows = self._pull_cached_coordinates(cache, include_timestamp,
+                                                 **options)
+            coordinates = [[latitude, longitude] if as_list else
+                           (latitude, longitude) for _, latitude, longitude
+                           in rows]
+            datetimes = [[row[0]] if as_list else (row[0],) for row in rows]
+        else:
+            if metadata is None:
+                metadata = self.pull_metadata(**options)
 
-        coordinates = [self.get_coordinates(datum, as_list=as_list)
-                       for datum in metadata]
+            coordinates = [self.get_coordinates(datum, as_list=as_list)
+                           for datum in metadata]
+            if include_timestamp:
+                datetimes = [[self.get_datetime(datum)] if as_list else
+                             (self.get_datetime(datum),) for datum in metadata]
         
         if not include_timestamp:
-            return coordinates
+            result = coordinates
         else:
-            datetimes = [[self.get_datetime(datum)] if as_list else
-                         (self.get_datetime(datum),) for datum in metadata]
             result = [datetimes[i]+coordinates[i] for i in range(len(datetimes))]
-            return sorted(result) if sort else result
+            if columnar:
+                # Sort the integer timestamps instead of the tuples
+                result = CoordinateArray.from_records(result)
+                return result.sort_by_time() if sort else result
+            result = sorted(result) if sort else result
+        return CoordinateArray.from_records(result) if columnar else result
+
+    def _pull_cached_coordinates(self, cache, include_timestamp,
+                                 workers=None, executor='thread',
+                                 fast=False):
+        """Pull the timestamp and coordinates of each stored image from
+        a cache, reading and caching only the images that are missing.
+        The missing images are read the same way as by pull_metadata.
+
+        Args:
+            cache (str/MetadataCache):
+                The cache, or the filepath of one.
+            include_timestamp (bool):
+                Whether the timestamps are needed. Images that were
+                cached without one are read again if so.
+
+        Kwargs:
+            workers (int) --> None:
+                The number of threads or processes to read the missing
+                images with. See pull_metadata.
+            executor (str) --> 'thread':
+                Either 'thread' or 'process'. See pull_metadata.
+            fast (bool) --> False:
+                Read only the headers of the missing images. See the
+                pull_exif method.
+
+        Returns:
+            A list of (timestamp, latitude, longitude) tuples, in the
+            same order as the stored image filepaths.
+        """
+
+        owned = not isinstance(cache, MetadataCache)
+        if owned:
+            cache = MetadataCache(cache)
+        try:
+            # Find the images that are missing from the cache first, so
+            # that they can all be read together
+            rows, missing = [], {}
+            for filepath in self._images:
+                stat = os.stat(filepath)
+                row = cache.lookup(filepath, stat=stat)
+                if row is None or (include_timestamp and row[0] is None):
+                    missing[filepath] = stat
+                rows.append(row)
+
+            found = {}
+            exifs = self._iter_exif(list(missing), workers=workers,
+                                    executor=executor, fast=fast)
+            for filepath, exif in exifs:
+                # Only look up the timestamp when it's needed, so that
+                # images without one behave as they otherwise would
+                timestamp = None
+                if include_timestamp or 'DateTime' in exif:
+                    timestamp = self.get_datetime(exif)
+                found[filepath] = (timestamp, *self.get_coordinates(exif))
+                cache.store(filepath, *found[filepath],
+                            stat=missing[filepath])
+            rows = [found[filepath] if filepath in found else row
+                    for filepath, row in zip(self._images, rows)]
+            cache.commit()
+        finally:
+            if owned:
+                cache.close()
+        return rows
 
     def get_datetime(self, exif_data, as_string=False):
         """Pull datetime information from image exif data.
@@ -337,8 +623,10 @@ class GeoPhotos:
         Args:
             filepath (str):
                 Location to save the csv file.
-            data (list):
-                List of coordinates to write the the csv file.
+            data (list/CoordinateArray):
+                List of coordinates to write the the csv file. The
+                rows of a CoordinateArray include its timestamps, if it
+                has any.
 
         Kwargs:
             labels (list) --> None:
@@ -348,15 +636,40 @@ class GeoPhotos:
                 Remove None values from the data before writing.
         """
 
-        if filter_none:
+        if isinstance(data, CoordinateArray):
+            if filter_none:
+                data = data.dropna()
+            data = data.iter_rows(
+                include_timestamp=data.timestamps is not None,
+            )
+        elif filter_none:
             data = [datum for datum in data if None not in datum]
 
         with open(filepath, 'w', newline='') as csv_file:
             writer = csv.writer(csv_file)
             if labels:
                 writer.writerow(labels)
-            for row in data:
-                writer.writerow(row)
+            writer.writerows(data)
+
+    def write_binary(self, filepath, data, compress=False):
+        """Write coordinate data to a binary .parquet or .npz file, which
+        is much faster to read back than a csv file. See the
+        write_coordinates and read_coordinates documentation.
+
+        Args:
+            filepath (str):
+                Location to save the file. Its extension determines its
+                format.
+            data (list/CoordinateArray):
+                List of coordinates to write to the file, such as those
+                returned by pull_coordinates.
+
+        Kwargs:
+            compress (bool) --> False:
+                Whether to compress the columns.
+        """
+
+        write_coordinates(filepath, data, compress=compress)
 
     def generate_heatmap(self, source='internal', coordinate_data=None,
                          latitude_column=None, longitude_column=None,
@@ -401,13 +714,17 @@ class GeoPhotos:
             longitudes = [datum[longitude_column-1] for datum in coordinate_data]
 
         elif source == 'csv':
-            data = pd.read_csv(coordinate_data)
-            latitudes = data.iloc[:, latitude_column-1]
-            longitudes = data.iloc[:, longitude_column-1]
+            data = coordinates_from_csv(coordinate_data, latitude_column,
+                                        longitude_column, columnar=True)
+            data = data.dropna()
+            latitudes, longitudes = data.latitudes, data.longitudes
 
         # Need to find a better way to make the heatmap more customizable
         # when being generated through the GeoPhotos class
 
+        import folium
+        from folium.plugins import HeatMap
+
         heatmap = folium.Map(location=[43.1065, -76.2177], zoom_start=14)
 
         heatmap_wide = HeatMap(
@@ -427,289 +744,11 @@ class GeoPhotos:
         return '\n'.join(sorted(self._images))
 
 
-class Map(folium.Map):
-    """Stores coordinate information and can generate maps."""
-
-    def __init__(self, *args, **kwargs):
-        """Initializes the object.
-        
-        Takes the same arguments as the folium.Map object. Please refer
-        to its own documentation.
-        """
-
-        folium.Map.__init__(self, *args, **kwargs)
-
-        self._coordinates = None
-        self._latitudes = None
-        self._longitudes = None
-
-    def _combine(self):
-        """Combines the stored latitudes list with the stored
-        longitudes list into a list of tuples."""
-
-        self._coordinates = list(zip(self._latitudes, self._longitudes))
-
-    @property
-    def coordinates(self):
-        """Returns the stored list of coordinates."""
-
-        return self._coordinates
-
-    @coordinates.setter
-    def coordinates(self, data):
-        """Sets the stored list of coordinates."""
+def __getattr__(name):
+    """Imports the map classes, which used to be defined here, only when
+    they are first used, since they require folium."""
 
-        self._coordinates = data
-
-    @property
-    def latitudes(self):
-        """Returns the stored list of latitudes."""
-
-        return self._latitudes
-
-    @latitudes.setter
-    def latitudes(self, data):
-        """Sets the stored list of latitudes."""
-
-        self._latitudes = data
-        # Combines the stored latitude and longitude lists if they have
-        # both been initialized
-        if self._latitudes and self._longitudes:
-            self._combine()
-
-    @property
-    def longitudes(self):
-        """Returns the stored list of longitudes."""
-
-        return self._longitudes
-
-    @longitudes.setter
-    def longitudes(self, data):
-        """Sets the stored list of longitudes."""
-
-        self._longitudes = data
-        # Combines the stored latitude and longitude lists if they have
-        # both been initialized
-        if self._latitudes and self._longitudes:
-            self._combine()
-
-    def feed(self, latitudes, longitudes):
-        """Sets the stored latitude and longitude lists, then combines
-        them into a combined coordinates list.
-        
-        Args:
-            latitudes (list):
-                A list containing latitude information.
-            longitudes (list):
-                A list containing longitude information.
-        """
-
-        self._latitudes = latitudes
-        self._longitudes = longitudes
-        self._combine()
-
-    def create_heatmap(self, **kwargs):
-        """Create a heatmap using the instance's coordinates.
-
-        The following parameter description were taken directly from
-        the folium.plugins.HeatMap documentation.
-        
-        Kwargs:
-            name (str) --> None:
-                The name of the Layer, as it will appear in
-                LayerControls.
-            min_opacity (int) --> 1;
-                The minimum opacity the heat will start at.
-            max_zoom (int) --> 18:
-                Zoom level where the points reach maximum intensity (as
-                intensity scales with zoom), equals maxZoom of the map
-                by default.
-            max_val (float) --> 1:
-                Maximum point intensity.
-            radius (int) --> 25:
-                Radius of each "point" of the heatmap.
-            blur (int) --> 15:
-                Amount of blur.
-            gradient (dict) --> None:
-                Color gradient config.
-                e.g. {0.4: 'blue', 0.65: 'lime', 1: 'red'}
-            overlay (bool) -- True:
-                Adds the layer as an optional overlay (True) or the
-                base layer (False).
-            control (bool) --> True:
-                Whether the Layer will be included in LayerControls.
-            show (bool) --> True:
-                Whether the layer will be shown on opening (only for
-                overlays).
-        """
-
-        # Raise an error if any invalid arguments are detected
-        valid = ['name', 'min_opacity', 'max_zoom', 'max_val', 'radius',
-                 'blur', 'gradient', 'overlay', 'control', 'show']
-        for kwarg in kwargs:
-            if kwarg not in valid:
-                raise ValueError('Invalid keyword argument.')
-
-        # Instantiate a heatmap object
-        heatmap = HeatMap(self._coordinates, **kwargs)
-        heatmap.add_to(self)
-
-    def add_marker(self, location, popup=None, tooltip=None):
-        """Add a marker to the Map instance.
-        
-        Args:
-            location (tuple/list):
-                Coordinates to place the marker at, passed in as either
-                a tuple or a list in the form: (latitude, longitude).
-        
-        Kwargs:
-            popup (dict/folium.Popup) [None]:
-                Add a popup to the marker. This can be passed in the
-                form of a dictionary containing the relevant
-                information, or as a folium.Popup object directly.
-                The default value of None will not add a popup.
-            tooltip (str) [None]:
-                Add a tooltip to the marker. HTML tags are accepted.
-                The default value of None will not add a tooltop to the
-                marker.
-        """
-
-        # Create a folium.Popup object if a dictionary was passed in
-        # via the popup argument, otherwise it is assumed that a
-        # folium.Popup object was passed in directly.
-        if isinstance(popup, dict):
-            valid = ['html', 'parse_html', 'max_width', 'show', 'sticky']
-            for kwarg in popup:
-                if kwarg not in valid:
-                    raise ValueError('Invalid keyword argument.')
-            popup = folium.Popup(**popup)
-
-        # Create a marker object and add it to the map
-        marker = folium.Marker(location=location, popup=popup, tooltip=tooltip)
-        marker.add_to(self)
-
-    def save_html(self, filepath, open_html=False):
-        """Save the Map instance to an interactive html file, and
-        optionally open it in a browser.
-        
-        Args:
-            filepath (str):
-                Path to save the html file to.
-        
-        Kwargs:
-            open_html (bool) [False]:
-                Whether or not to open the file in a browser after
-                saving.
-        """
-
-        self.save(filepath)
-        if open_html:
-            self.open_html(filepath)
-
-    def open_html(self, filepath):
-        """Open the specified html file in a browser.
-        
-        Args:
-            filepath (str):
-                Path to the html file.
-        """
-
-        webbrowser.open(f'file://{filepath}')
-
-    def add_layer_control(self):
-        """Add layer controls to the map.
-        
-        This method is an extremely thin wrapper around
-        folium.LayerControl, and is meant to instantiate it and then
-        add it to the map object immediately.
-        """
-
-        folium.LayerControl().add_to(self)
-
-
-@requires_geopandas
-class CountryLayer(folium.GeoJson):
-    '''Wrapper around the folium.GeoJson class. Adds a layer on top of
-    a Map instance which highlights the specified countries.
-    
-    This wrapper mainly exists to make it easier for a user to specify
-    which countries they want highlighted and to also initialize a
-    folium.GeoJson object with this information -- all in one step.
-    
-    This class is only available if geopandas has been successfully
-    imported, otherwise an ImportError will be raised when called.
-    '''
-
-    def __init__(self, countries='all', name=None):
-        '''Initializes the object. Takes a list of countries and gets
-        their relevant polygons/shapes.
-        
-        Kwargs:
-            countries (str/list) --> 'all':
-                A list of countries to be highlighted. The default
-                value of 'all' will plot all countries.
-            name (str) --> None:
-                The name of the layer, which will be displayed if
-                layer control is enabled on the Map instance.
-        '''
-
-        # Get the world borders/shapes information
-        self.borders = gpd.read_file('zip://data/world_borders.zip')
-        # Generate a geopandas dataframe of the specified countries' info
-        if isinstance(countries, str) and countries == 'all':
-            self.countries = self.borders
-        elif isinstance(countries, str):
-            self.countries = self.borders[self.borders['NAME'] == countries]
-        else:
-            self.countries = self.borders[self.borders['NAME'].isin(countries)]
-        # Initialize the folium.GeoJson object
-        folium.GeoJson.__init__(self, self.countries, name=name)
-        
-    def add_to(self, map_object):
-        '''Extremely thin wrapper around the inherited add_to method,
-        simply to expose it.'''
-        
-        super().add_to(map_object)
-
-
-if __name__ == '__main__':
-
-    import pickle
-    from .data import coordinates_from_csv
-
-    # Read coordinate data from csv
-    data_path = os.path.join('data', 'testing', 'coordinates.csv')
-    data = coordinates_from_csv(data_path, 2, 3)
-    # Initialize the Map object
-    nys_center = [42.965000, -76.016667]
-    heatmap = Map(location=nys_center, zoom_start=7)
-    # Feed the Heatmap object the coordinates
-    heatmap.coordinates = data
-    # Create the heatmap
-    heatmap.create_heatmap(max_zoom=10, min_opacity=0.05, radius=13, blur=25,
-                           name='Photo Heatmap')
-    # Add a marker to the heatmap
-    hamburg_ny = [42.715746, -78.829416]
-    heatmap.add_marker(location=hamburg_ny,
-                       tooltip='<strong>Hamburg, NY</strong><br>Hometown')
-    # Analyze the data
-    pickle_path = os.path.join('data', 'testing', 'coordinates.pickle')
-    with open(pickle_path, 'rb') as pickle_file:
-        analyzer = pickle.load(pickle_file)
-    results = {
-        'Unique Countries': analyzer.unique_countries(),
-        'Count': analyzer.number_of_countries(),
-        'Frequency': analyzer.country_frequency(),
-        'Most Common': analyzer.most_common(5),
-    }
-    # Use the data to determine which countries to highlight
-    border_layer = CountryLayer(results['Unique Countries'],
-                               name='Countries Visited')
-    border_layer.add_to(heatmap)
-    # Add layer control functionality to the map
-    heatmap.add_layer_control()
-    # Save the heatmap and open it in a browser
-    main_directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    html_name = 'testing.html'
-    path = os.path.join(main_directory, 'tests', 'sample_results', html_name)
-    heatmap.save_html(path, open_html=True)
+    if name in ('Map', 'CountryLayer'):
+        from . import maps
+        return getattr(maps, name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -0,0 +1,627 @@
+# -*- coding: utf-8 -*-
+
+"""
+geophotos.maps
+~~~~~~~~~~~~~~
+
+Provides the Map class, which plots coordinate data on an interactive
+folium map as heatmaps, heatmap pyramids or prerendered heat tiles, and
+the CountryLayer class, which highlights countries on such a map.
+
+These classes require folium, so this module is only imported once one
+of them is first used.
+"""
+
+import json
+import os
+import warnings
+import webbrowser
+
+import folium
+import numpy as np
+from branca.element import MacroElement, Template
+from folium.plugins import HeatMap
+
+from .aggregate import (DEFAULT_RESOLUTION, aggregate_coordinates,
+                        aggregate_pyramid)
+from .analyze import WORLD_BORDERS, simplify_countries
+from .coordinates import CoordinateArray
+from .tiles import EMPTY_TILE, render_heat_tiles
+
+
+class _ZoomSwitch(MacroElement):
+    """Shows each of a map's layers only within its own range of zoom
+    levels, adding and removing the layers as the map is zoomed."""
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        (function() {
+            var map = {{ this._parent.get_name() }};
+            var bands = [
+                {%- for layer, low, high in this.bands %}
+                [{{ layer.get_name() }}, {{ low }}, {{ high }}],
+                {%- endfor %}
+            ];
+            function update() {
+                var zoom = map.getZoom();
+                bands.forEach(function(band) {
+                    var visible = zoom >= band[1] && zoom <= band[2];
+                    if (visible && !map.hasLayer(band[0])) {
+                        map.addLayer(band[0]);
+                    } else if (!visible && map.hasLayer(band[0])) {
+                        map.removeLayer(band[0]);
+                    }
+                });
+            }
+            map.on('zoomend', update);
+            update();
+        })();
+        {% endmacro %}
+    """)
+
+    def __init__(self, bands):
+        """Initializes the object.
+
+        Args:
+            bands (list):
+                A list of (layer, lowest zoom, highest zoom) tuples.
+        """
+
+        MacroElement.__init__(self)
+        self._name = 'ZoomSwitch'
+        self.bands = bands
+
+
+class Map(folium.Map):
+    """Stores coordinate information and can generate maps."""
+
+    def __init__(self, *args, **kwargs):
+        """Initializes the object.
+        
+        Takes the same arguments as the folium.Map object. Please refer
+        to its own documentation.
+        """
+
+        folium.Map.__init__(self, *args, **kwargs)
+
+        self._coordinates = None
+        self._latitudes = None
+        self._longitudes = None
+        self._timestamps = None
+        self._time_window = None
+
+    def _combine(self):
+        """Combines the stored latitudes list with the stored
+        longitudes list into a CoordinateArray, which behaves like a
+        list of tuples."""
+
+        self._coordinates = CoordinateArray(self._latitudes, self._longitudes,
+                                            self._timestamps)
+
+    def _selected(self):
+        """Returns the stored coordinates that are in the time window,
+        if there is one."""
+
+        if self._time_window is None:
+            return self._coordinates
+        coordinates = self._coordinates
+        if (not isinstance(coordinates, CoordinateArray)
+                or coordinates.timestamps is None):
+            raise ValueError('A time window can only be used with a '
+                             'CoordinateArray that has timestamps.')
+        return coordinates.between(*self._time_window)
+
+    @property
+    def coordinates(self):
+        """Returns the stored list of coordinates."""
+
+        return self._coordinates
+
+    @coordinates.setter
+    def coordinates(self, data):
+        """Sets the stored list of coordinates."""
+
+        self._coordinates = data
+
+    @property
+    def latitudes(self):
+        """Returns the stored list of latitudes."""
+
+        return self._latitudes
+
+    @latitudes.setter
+    def latitudes(self, data):
+        """Sets the stored list of latitudes."""
+
+        self._latitudes = data
+        # Combines the stored latitude and longitude lists if they have
+        # both been initialized
+        if self._latitudes is not None and self._longitudes is not None:
+            self._combine()
+
+    @property
+    def longitudes(self):
+        """Returns the stored list of longitudes."""
+
+        return self._longitudes
+
+    @longitudes.setter
+    def longitudes(self, data):
+        """Sets the stored list of longitudes."""
+
+        self._longitudes = data
+        # Combines the stored latitude and longitude lists if they have
+        # both been initialized
+        if self._latitudes is not None and self._longitudes is not None:
+            self._combine()
+
+    @property
+    def time_window(self):
+        """Returns the (start, end) window of time that the coordinates
+        are narrowed down to, or None."""
+
+        return self._time_window
+
+    @time_window.setter
+    def time_window(self, window):
+        """Narrows the coordinates that are drawn down to those from a
+        (start, end) window of time, or draws all of them if None.
+        Either end may also be None. See CoordinateArray.between."""
+
+        if window is not None:
+            start, end = window
+            window = (start, end)
+        self._time_window = window
+
+    def feed(self, latitudes, longitudes, timestamps=None):
+        """Sets the stored latitude and longitude lists, then combines
+        them into a combined coordinates list.
+        
+        Args:
+            latitudes (list):
+                A list containing latitude information.
+            longitudes (list):
+                A list containing longitude information.
+
+        Kwargs:
+            timestamps (list) --> None:
+                A list of the timestamp of each coordinate, which
+                allows a time window to be used.
+        """
+
+        self._latitudes = latitudes
+        self._longitudes = longitudes
+        self._timestamps = timestamps
+        self._combine()
+
+    def create_heatmap(self, resolution=None, max_points=None, **kwargs):
+        """Create a heatmap using the instance's coordinates.
+
+        Every coordinate is embedded in the html file by default. For
+        large datasets, the coordinates can instead be aggregated into
+        one weighted point per grid cell, so that the size of the file
+        depends on the number of occupied cells. See the
+        aggregate_coordinates documentation.
+
+        Kwargs:
+            resolution (float) --> None:
+                Aggregate the coordinates into grid cells of this many
+                degrees. A value of None will use DEFAULT_RESOLUTION if
+                max_points is given, and not aggregate otherwise.
+            max_points (int) --> None:
+                Aggregate the coordinates into at most this many
+                points, using coarser cells as necessary.
+
+        The following parameter description were taken directly from
+        the folium.plugins.HeatMap documentation.
+        
+        Kwargs:
+            name (str) --> None:
+                The name of the Layer, as it will appear in
+                LayerControls.
+            min_opacity (int) --> 1;
+                The minimum opacity the heat will start at.
+            max_zoom (int) --> 18:
+                Zoom level where the points reach maximum intensity (as
+                intensity scales with zoom), equals maxZoom of the map
+                by default.
+            max_val (float) --> 1:
+                Maximum point intensity.
+            radius (int) --> 25:
+                Radius of each "point" of the heatmap.
+            blur (int) --> 15:
+                Amount of blur.
+            gradient (dict) --> None:
+                Color gradient config.
+                e.g. {0.4: 'blue', 0.65: 'lime', 1: 'red'}
+            overlay (bool) -- True:
+                Adds the layer as an optional overlay (True) or the
+                base layer (False).
+            control (bool) --> True:
+                Whether the Layer will be included in LayerControls.
+            show (bool) --> True:
+                Whether the layer will be shown on opening (only for
+                overlays).
+        """
+
+        # Raise an error if any invalid arguments are detected
+        valid = ['name', 'min_opacity', 'max_zoom', 'max_val', 'radius',
+                 'blur', 'gradient', 'overlay', 'control', 'show']
+        for kwarg in kwargs:
+            if kwarg not in valid:
+                raise ValueError('Invalid keyword argument.')
+
+        # Leaflet can't plot missing values, and passing the columns as
+        # an array avoids building a list of tuples first
+        coordinates = self._selected()
+        if resolution is not None or max_points is not None:
+            coordinates = aggregate_coordinates(
+                coordinates,
+                resolution=resolution or DEFAULT_RESOLUTION,
+                max_points=max_points,
+            )
+        elif isinstance(coordinates, CoordinateArray):
+            coordinates = np.asarray(coordinates.dropna())
+
+        # Instantiate a heatmap object
+        heatmap = HeatMap(coordinates, **kwargs)
+        heatmap.add_to(self)
+
+    def create_heatmap_pyramid(self, min_zoom=0, max_zoom=18, zoom_step=2,
+                               cell_size=2, max_points=50000, **kwargs):
+        """Create a heatmap that is aggregated differently for each
+        band of zoom levels, showing only the layer of the current zoom
+        level. Every layer stays small, since the cells of each band are
+        a few pixels in size at its zoom levels.
+
+        Kwargs:
+            min_zoom (int) --> 0:
+                The lowest zoom level to create a layer for.
+            max_zoom (int) --> 18:
+                The highest zoom level to create a layer for.
+            zoom_step (int) --> 2:
+                The number of zoom levels in each band. Each band's
+                cells are 2**zoom_step times larger than those of the
+                band above it.
+            cell_size (float) --> 2:
+                The size of the cells in pixels at the lowest zoom
+                level of each band.
+            max_points (int) --> 50000:
+                The maximum number of points of each layer. Bands that
+                would have more use coarser cells, and bands that end
+                up with the same cells share a single layer. A value of
+                None will not limit the number of points.
+
+        Any other keyword arguments are passed to each layer. See the
+        create_heatmap documentation.
+        """
+
+        valid = ['min_opacity', 'radius', 'blur', 'gradient']
+        for kwarg in kwargs:
+            if kwarg not in valid:
+                raise ValueError('Invalid keyword argument.')
+        # Toggling a single band on its own isn't meaningful
+        kwargs.update(max_zoom=max_zoom, control=False)
+
+        lows = list(range(min_zoom, max_zoom + 1, zoom_step))
+        # A tile of 256 pixels spans 360 degrees at zoom level zero
+        resolution = cell_size * 360 / (256 * 2 ** lows[-1])
+        pyramid = aggregate_pyramid(self._selected(), resolution=resolution,
+                                    levels=len(lows), step=zoom_step,
+                                    max_points=max_points)
+
+        # Merge the bands that share the same points, from the highest
+        # zoom levels to the lowest
+        merged = []
+        for low, points in zip(reversed(lows), pyramid):
+            if merged and merged[-1][0] is points:
+                merged[-1][1] = low
+            else:
+                high = min(low + zoom_step - 1, max_zoom)
+                merged.append([points, low, high])
+
+        bands = []
+        for points, low, high in merged:
+            heatmap = HeatMap(points, name=f'Zoom {low}-{high}', **kwargs)
+            heatmap.add_to(self)
+            bands.append((heatmap, low, high))
+        # The switch must come after the layers that it refers to
+        _ZoomSwitch(bands).add_to(self)
+
+    def create_heat_tiles(self, directory, url=None, name=None, min_zoom=0,
+                          max_zoom=12, workers=None, **kwargs):
+        """Render the instance's coordinates into a directory of heatmap
+        tiles, then add them to the map as a tile layer. This is much
+        lighter for the browser than a heatmap of a large dataset, since
+        only the tiles in view are loaded.
+
+        Args:
+            directory (str):
+                The directory to save the tiles in.
+
+        Kwargs:
+            url (str) --> None:
+                The location of the directory as seen from the html
+                file. A value of None will use the directory as given.
+            name (str) --> None:
+                The name of the layer, as it will appear in
+                LayerControls.
+            min_zoom (int) --> 0:
+                The lowest zoom level to render tiles for.
+            max_zoom (int) --> 12:
+                The highest zoom level to render tiles for. The tiles
+                of this zoom level are enlarged at higher zoom levels.
+            workers (int) --> None:
+                The number of processes to render the tiles with.
+
+        Any other keyword arguments (radius, gradient, min_opacity) are
+        passed to render_heat_tiles. Please refer to its documentation.
+
+        Returns:
+            The number of tiles that were saved.
+        """
+
+        saved = render_heat_tiles(self._selected(), directory,
+                                  min_zoom=min_zoom, max_zoom=max_zoom,
+                                  workers=workers, **kwargs)
+        self.add_heat_tiles(directory if url is None else url, name=name,
+                            min_zoom=min_zoom, max_zoom=max_zoom)
+        return saved
+
+    def add_heat_tiles(self, url, name=None, min_zoom=0, max_zoom=12):
+        """Add a directory of heatmap tiles to the map as a tile layer.
+        See the create_heat_tiles documentation.
+
+        Args:
+            url (str):
+                The location of the directory as seen from the html
+                file.
+
+        Kwargs:
+            name (str) --> None:
+                The name of the layer, as it will appear in
+                LayerControls.
+            min_zoom (int) --> 0:
+                The lowest zoom level that the tiles were rendered for.
+            max_zoom (int) --> 12:
+                The highest zoom level that the tiles were rendered
+                for.
+        """
+
+        url = url.replace(os.sep, '/').rstrip('/')
+        tiles = folium.TileLayer(
+            tiles=f'{url}/{{z}}/{{x}}/{{y}}.png',
+            name=name,
+            attr='GeoPhotos',
+            overlay=True,
+            min_zoom=min_zoom,
+            max_native_zoom=max_zoom,
+            # Tiles without any heat were never saved
+            error_tile_url=f'{url}/{EMPTY_TILE}',
+        )
+        tiles.add_to(self)
+
+    def add_marker(self, location, popup=None, tooltip=None):
+        """Add a marker to the Map instance.
+        
+        Args:
+            location (tuple/list):
+                Coordinates to place the marker at, passed in as either
+                a tuple or a list in the form: (latitude, longitude).
+        
+        Kwargs:
+            popup (dict/folium.Popup) [None]:
+                Add a popup to the marker. This can be passed in the
+                form of a dictionary containing the relevant
+                information, or as a folium.Popup object directly.
+                The default value of None will not add a popup.
+            tooltip (str) [None]:
+                Add a tooltip to the marker. HTML tags are accepted.
+                The default value of None will not add a tooltop to the
+                marker.
+        """
+
+        # Create a folium.Popup object if a dictionary was passed in
+        # via the popup argument, otherwise it is assumed that a
+        # folium.Popup object was passed in directly.
+        if isinstance(popup, dict):
+            valid = ['html', 'parse_html', 'max_width', 'show', 'sticky']
+            for kwarg in popup:
+                if kwarg not in valid:
+                    raise ValueError('Invalid keyword argument.')
+            popup = folium.Popup(**popup)
+
+        # Create a marker object and add it to the map
+        marker = folium.Marker(location=location, popup=popup, tooltip=tooltip)
+        marker.add_to(self)
+
+    def save_html(self, filepath, open_html=False):
+        """Save the Map instance to an interactive html file, and
+        optionally open it in a browser.
+        
+        Args:
+            filepath (str):
+                Path to save the html file to.
+        
+        Kwargs:
+            open_html (bool) [False]:
+                Whether or not to open the file in a browser after
+                saving.
+        """
+
+        self.save(filepath)
+        if open_html:
+            self.open_html(filepath)
+
+    def open_html(self, filepath):
+        """Open the specified html file in a browser.
+        
+        Args:
+            filepath (str):
+                Path to the html file.
+        """
+
+        webbrowser.open(f'file://{filepath}')
+
+    def add_layer_control(self):
+        """Add layer controls to the map.
+        
+        This method is an extremely thin wrapper around
+        folium.LayerControl, and is meant to instantiate it and then
+        add it to the map object immediately.
+        """
+
+        folium.LayerControl().add_to(self)
+
+
+class CountryLayer(folium.GeoJson):
+    '''Wrapper around the folium.GeoJson class. Adds a layer on top of
+    a Map instance which highlights the specified countries.
+    
+    This wrapper mainly exists to make it easier for a user to specify
+    which countries they want highlighted and to also initialize a
+    folium.GeoJson object with this information -- all in one step.
+    
+    The borders are read from the same in-memory table of countries as
+    the Analyzer uses, so the shapefile is only read once per process.
+    The border_table and country_table attributes hold the Country rows
+    of that table. The borders and countries attributes, which hold
+    them as GeoDataFrames, are deprecated.
+    '''
+
+    def __init__(self, countries='all', name=None, shapefile=WORLD_BORDERS,
+                 simplify_tolerance=None, precision=None):
+        '''Initializes the object. Takes a list of countries and gets
+        their relevant polygons/shapes.
+        
+        Kwargs:
+            countries (str/list) --> 'all':
+                A list of countries to be highlighted. The default
+                value of 'all' will plot all countries.
+            name (str) --> None:
+                The name of the layer, which will be displayed if
+                layer control is enabled on the Map instance.
+            shapefile (str) --> WORLD_BORDERS:
+                Path to a shapefile that contains world map
+                information.
+            simplify_tolerance (float) --> None:
+                Simplify the borders so that they move by no more than
+                this many degrees, which makes the html file much
+                smaller. The simplified borders are remembered for each
+                tolerance. A value of None will use the full borders.
+            precision (int) --> None:
+                The number of decimal places to write each coordinate
+                of the borders with, which makes the html file smaller.
+                A value of None will write them in full.
+        '''
+
+        # Get the world borders/shapes information
+        self.border_table = simplify_countries(shapefile, simplify_tolerance)
+        # Select the specified countries from the table
+        if isinstance(countries, str) and countries == 'all':
+            self.country_table = self.border_table
+        elif isinstance(countries, str):
+            self.country_table = tuple(country for country
+                                       in self.border_table
+                                       if country.name == countries)
+        else:
+            countries = set(countries)
+            self.country_table = tuple(country for country
+                                       in self.border_table
+                                       if country.name in countries)
+        # Convert the countries to GeoJSON, truncating the coordinates
+        options = []
+        if precision is not None:
+            options.append(f'COORDINATE_PRECISION={precision}')
+        features = [{
+            'type': 'Feature',
+            'properties': dict(country.properties),
+            'geometry': json.loads(country.geometry.ExportToJson(options)),
+        } for country in self.country_table]
+        data = {'type': 'FeatureCollection', 'features': features}
+        # Initialize the folium.GeoJson object
+        folium.GeoJson.__init__(self, data, name=name)
+
+    @staticmethod
+    def _data_frame(table, attribute, replacement):
+        '''Converts Country rows to a GeoDataFrame for the deprecated
+        attributes, with every field of the shapefile and the geometry
+        in full.'''
+
+        warnings.warn(f'CountryLayer.{attribute} is deprecated, use '
+                      f'CountryLayer.{replacement} instead, which holds '
+                      'Country rows rather than a GeoDataFrame.',
+                      DeprecationWarning, stacklevel=3)
+        import geopandas as gpd
+
+        features = [{
+            'type': 'Feature',
+            'properties': dict(country.properties),
+            'geometry': json.loads(country.geometry.ExportToJson()),
+        } for country in table]
+        return gpd.GeoDataFrame.from_features(features, crs='EPSG:4326')
+
+    @property
+    def borders(self):
+        '''Deprecated. Returns every country of the shapefile as a
+        GeoDataFrame. See border_table.'''
+
+        return self._data_frame(self.border_table, 'borders',
+                                'border_table')
+
+    @property
+    def countries(self):
+        '''Deprecated. Returns the highlighted countries as a
+        GeoDataFrame. See country_table.'''
+
+        return self._data_frame(self.country_table, 'countries',
+                                'country_table')
+        
+    def add_to(self, map_object):
+        '''Extremely thin wrapper around the inherited add_to method,
+        simply to expose it.'''
+        
+        super().add_to(map_object)
+
+
+if __name__ == '__main__':
+
+    import pickle
+    from .data import coordinates_from_csv
+
+    # Read coordinate data from csv
+    data_path = os.path.join('data', 'testing', 'coordinates.csv')
+    data = coordinates_from_csv(data_path, 2, 3)
+    # Initialize the Map object
+    nys_center = [42.965000, -76.016667]
+    heatmap = Map(location=nys_center, zoom_start=7)
+    # Feed the Heatmap object the coordinates
+    heatmap.coordinates = data
+    # Create the heatmap
+    heatmap.create_heatmap(max_zoom=10, min_opacity=0.05, radius=13, blur=25,
+                           name='Photo Heatmap')
+    # Add a marker to the heatmap
+    hamburg_ny = [42.715746, -78.829416]
+    heatmap.add_marker(location=hamburg_ny,
+                       tooltip='<strong>Hamburg, NY</strong><br>Hometown')
+    # Analyze the data
+    pickle_path = os.path.join('data', 'testing', 'coordinates.pickle')
+    with open(pickle_path, 'rb') as pickle_file:
+        analyzer = pickle.load(pickle_file)
+    results = {
+        'Unique Countries': analyzer.unique_countries(),
+        'Count': analyzer.number_of_countries(),
+        'Frequency': analyzer.country_frequency(),
+        'Most Common': analyzer.most_common(5),
+    }
+    # Use the data to determine which countries to highlight
+    border_layer = CountryLayer(results['Unique Countries'],
+                               name='Countries Visited')
+    border_layer.add_to(heatmap)
+    # Add layer control functionality to the map
+    heatmap.add_layer_control()
+    # Save the heatmap and open it in a browser
+    main_directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    html_name = 'testing.html'
+    path = os.path.join(main_directory, 'tests', 'sample_results', html_name)
+    heatmap.save_html(path, open_html=True)
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+"""
+geophotos.scan
+~~~~~~~~~~~~~~
+
+Finds the images in a directory tree. Directories are listed with
+os.scandir, which reports whether each entry is a file or a directory
+along with its name, so nothing is stat-ed one file at a time. This
+matters on network storage, where every stat is a round trip.
+"""
+
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# File extensions of the images that exif data can be pulled from
+IMAGE_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.jpe', '.tif', '.tiff',
+                              '.heic', '.heif', '.png', '.webp'})
+
+
+def _scan_directory(path, suffixes, follow_symlinks, skip_errors):
+    '''Lists the images and subdirectories of a single directory.
+
+    Returns:
+        A tuple of a list of image filepaths and a list of the paths of
+        the subdirectories.
+    '''
+
+    images, directories = [], []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                # Checking the name first avoids even the rare stat that
+                # is needed when the type of an entry isn't known, while
+                # a directory named like an image is still searched
+                if (entry.name.lower().endswith(suffixes)
+                        and entry.is_file(follow_symlinks=follow_symlinks)):
+                    images.append(entry.path)
+                elif entry.is_dir(follow_symlinks=follow_symlinks):
+                    directories.append(entry.path)
+    except OSError:
+        if not skip_errors:
+            raise
+    return images, directories
+
+
+def iter_images(directory, extensions=None, recursive=True, workers=None,
+                follow_symlinks=False):
+    '''Finds the images in a directory, one directory at a time.
+
+    Args:
+        directory (str):
+            The directory to search for images.
+
+    Kwargs:
+        extensions (iterable) --> None:
+            The file extensions of the images to find, which are
+            compared case-insensitively. A value of None will use
+            IMAGE_EXTENSIONS.
+        recursive (bool) --> True:
+            Whether or not to search the subdirectories as well.
+        workers (int) --> None:
+            The number of threads to list directories with, which helps
+            on network storage with many subdirectories. A value of
+            None or 1 will list them one at a time in the current
+            thread.
+        follow_symlinks (bool) --> False:
+            Whether or not to follow symbolic links to images and
+            directories. Links to directories can create cycles.
+
+    Yields:
+        The filepath of each image, in no particular order.
+
+    Raises:
+        OSError: If the directory itself can't be listed. Subdirectories
+            that can't be listed are skipped.
+    '''
+
+    if extensions is None:
+        extensions = IMAGE_EXTENSIONS
+    suffixes = tuple(extension.lower() for extension in extensions)
+
+    images, directories = _scan_directory(directory, suffixes,
+                                          follow_symlinks, False)
+    yield from images
+    if not recursive:
+        return
+
+    if workers is None or workers <= 1:
+        while directories:
+            images, found = _scan_directory(directories.pop(), suffixes,
+                                            follow_symlinks, True)
+            directories.extend(found)
+            yield from images
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {pool.submit(_scan_directory, path, suffixes,
+                               follow_symlinks, True)
+                   for path in directories}
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    images, found = future.result()
+                    pending.update(pool.submit(_scan_directory, path,
+                                               suffixes, follow_symlinks,
+                                               True)
+                                   for path in found)
+                    yield from images
+        finally:
+            # Don't list directories whose images will never be asked for
+            for future in pending:
+                future.cancel()
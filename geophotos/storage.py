@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+
+"""
+geophotos.storage
+~~~~~~~~~~~~~~~~~
+
+Saves coordinate data in compact binary files that store the timestamp,
+latitude and longitude columns as they are, so that they can be read
+back without parsing any text. Two formats are supported:
+
+* Parquet, which requires the optional pyarrow package.
+* NumPy's .npz format, which only requires numpy. Files that are saved
+  without compression are memory-mapped when they are read, so that
+  even very large files open almost instantly.
+"""
+
+import os
+import struct
+import zipfile
+
+import numpy as np
+
+from .coordinates import CoordinateArray
+
+# Version of the layout of the saved columns, which is stored in the files
+FORMAT_VERSION = 1
+
+# Key of the format version in the metadata of Parquet files
+_PARQUET_KEY = b'geophotos_version'
+
+
+def _format_of(filepath):
+    '''Determines the format of a file from its extension.
+
+    Raises:
+        ValueError: If the extension isn't .parquet or .npz.
+    '''
+
+    extension = os.path.splitext(filepath)[1].lower()
+    if extension not in ('.parquet', '.npz'):
+        raise ValueError('Coordinates can only be stored in .parquet or .npz '
+                         'files.')
+    return extension[1:]
+
+
+def _import_parquet():
+    '''Imports pyarrow, which is an optional dependency.'''
+
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError('PyArrow is required to use Parquet files. Save '
+                          'to an .npz file instead.') from None
+    return pyarrow, pyarrow.parquet
+
+
+def write_coordinates(filepath, coordinates, compress=False):
+    '''Saves coordinate data to a .parquet or .npz file.
+
+    Args:
+        filepath (str):
+            Location to save the file. Its extension determines its
+            format.
+        coordinates (list/CoordinateArray):
+            The coordinate data, as a CoordinateArray or as a list of
+            (latitude, longitude) or (timestamp, latitude, longitude)
+            tuples.
+
+    Kwargs:
+        compress (bool) --> False:
+            Whether to compress the columns. Compressed .npz files are
+            smaller, but can't be memory-mapped. Parquet files are
+            always compressed, with zstd instead of snappy if True.
+    '''
+
+    if not isinstance(coordinates, CoordinateArray):
+        coordinates = CoordinateArray.from_records(coordinates)
+
+    if _format_of(filepath) == 'parquet':
+        pa, pq = _import_parquet()
+        columns = {'latitude': coordinates.latitudes,
+                   'longitude': coordinates.longitudes}
+        if coordinates.timestamps is not None:
+            columns = {'timestamp': pa.array(coordinates.datetimes),
+                       **columns}
+        table = pa.table(columns)
+        table = table.replace_schema_metadata(
+            {_PARQUET_KEY: str(FORMAT_VERSION).encode()}
+        )
+        pq.write_table(table, filepath,
+                       compression='zstd' if compress else 'snappy')
+        return
+
+    columns = {'version': np.array(FORMAT_VERSION),
+               'latitude': coordinates.latitudes,
+               'longitude': coordinates.longitudes}
+    if coordinates.timestamps is not None:
+        columns['timestamp'] = coordinates.timestamps
+    write_npz(filepath, columns, compress=compress)
+
+
+def write_npz(filepath, arrays, compress=False):
+    '''Saves arrays to an .npz file, exactly at the given filepath.
+
+    Args:
+        filepath (str):
+            Location to save the file.
+        arrays (dict):
+            The arrays to save, by their names.
+
+    Kwargs:
+        compress (bool) --> False:
+            Whether to compress the arrays, which prevents them from
+            being memory-mapped by read_npz.
+    '''
+
+    save = np.savez_compressed if compress else np.savez
+    # Write through a file object so that numpy doesn't add an extension
+    with open(filepath, 'wb') as output:
+        save(output, **arrays)
+
+
+def read_npz(filepath, mmap=True):
+    '''Reads every array of an .npz file.
+
+    Args:
+        filepath (str):
+            Location of the .npz file.
+
+    Kwargs:
+        mmap (bool) --> True:
+            Whether to memory-map the uncompressed arrays instead of
+            reading them into memory. Compressed arrays are always
+            read into memory.
+
+    Returns:
+        A dictionary of the arrays by their names.
+    '''
+
+    if not mmap:
+        with np.load(filepath) as archive:
+            return {name: archive[name] for name in archive.files}
+    return _map_npz(filepath)
+
+
+def _map_npz(filepath):
+    '''Memory-maps every uncompressed array of an .npz file, and loads
+    the compressed arrays into memory. See read_npz.
+    '''
+
+    arrays = dict()
+    with zipfile.ZipFile(filepath) as archive, open(filepath, 'rb') as stream:
+        for info in archive.infolist():
+            name = info.filename[:-len('.npy')]
+            if info.compress_type != zipfile.ZIP_STORED:
+                with archive.open(info) as member:
+                    arrays[name] = np.lib.format.read_array(member)
+                continue
+            # Skip over the member's local header to its .npy data
+            stream.seek(info.header_offset)
+            header = stream.read(30)
+            name_length, extra_length = struct.unpack('<HH', header[26:30])
+            stream.seek(info.header_offset + 30 + name_length + extra_length)
+            version = np.lib.format.read_magic(stream)
+            if version == (1, 0):
+                read_header = np.lib.format.read_array_header_1_0
+            else:
+                read_header = np.lib.format.read_array_header_2_0
+            shape, fortran_order, dtype = read_header(stream)
+            if not np.prod(shape):
+                arrays[name] = np.empty(shape, dtype=dtype)
+                continue
+            arrays[name] = np.memmap(filepath, dtype=dtype, mode='r',
+                                     offset=stream.tell(), shape=shape,
+                                     order='F' if fortran_order else 'C')
+    return arrays
+
+
+def read_coordinates(filepath, mmap=True):
+    '''Reads coordinate data that was saved by write_coordinates.
+
+    Args:
+        filepath (str):
+            Location of the .parquet or .npz file.
+
+    Kwargs:
+        mmap (bool) --> True:
+            Whether to memory-map the columns of an uncompressed .npz
+            file instead of reading them into memory. Parquet files are
+            memory-mapped while they are read.
+
+    Returns:
+        A CoordinateArray of the saved coordinates.
+
+    Raises:
+        ValueError: If the file was saved by a newer version of the
+            format.
+    '''
+
+    if _format_of(filepath) == 'parquet':
+        _, pq = _import_parquet()
+        table = pq.read_table(filepath, memory_map=True)
+        metadata = table.schema.metadata or dict()
+        version = int(metadata.get(_PARQUET_KEY, FORMAT_VERSION))
+        columns = {name: table.column(name).to_numpy()
+                   for name in table.column_names}
+    else:
+        columns = read_npz(filepath, mmap=mmap)
+        version = int(columns['version'])
+
+    if version > FORMAT_VERSION:
+        raise ValueError(f'Unsupported coordinate file version {version}.')
+    return CoordinateArray(columns['latitude'], columns['longitude'],
+                           columns.get('timestamp'))
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+
+"""
+geophotos.tiles
+~~~~~~~~~~~~~~~
+
+Renders coordinate data into a directory of heatmap tiles, in the
+{z}/{x}/{y}.png layout that web maps use. The heat is drawn once, ahead
+of time, so a browser only has to download the tiles that are in view
+instead of drawing millions of points itself.
+"""
+
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from PIL import Image, ImageColor
+
+# Width and height of every tile in pixels
+TILE_SIZE = 256
+
+# Same default colors as the leaflet heatmap plugin that folium uses
+DEFAULT_GRADIENT = {0.4: 'blue', 0.6: 'cyan', 0.7: 'lime', 0.8: 'yellow',
+                    1.0: 'red'}
+
+# Latitudes beyond this can't be shown by the web mercator projection
+_MAX_LATITUDE = 85.0511287798
+
+# Name of the transparent tile that is shown wherever there is no heat
+EMPTY_TILE = 'empty.png'
+
+
+def _project(latitudes, longitudes, zoom):
+    '''Projects coordinates to web mercator pixel coordinates.
+
+    Returns:
+        A tuple of the x and y pixel coordinates at the zoom level, with
+        the origin at the top left corner of the world.
+    '''
+
+    size = TILE_SIZE * 2 ** zoom
+    latitudes = np.radians(np.clip(latitudes, -_MAX_LATITUDE, _MAX_LATITUDE))
+    x = (longitudes + 180) / 360 * size
+    y = (1 - np.log(np.tan(latitudes) + 1 / np.cos(latitudes)) / np.pi)
+    return x, y / 2 * size
+
+
+def _palette(gradient, min_opacity):
+    '''Creates a lookup table of 256 RGBA colors from a gradient.
+
+    Args:
+        gradient (dict):
+            Colors by the intensity, from 0 to 1, at which they are
+            reached.
+        min_opacity (float):
+            The opacity of the lowest intensity.
+
+    Returns:
+        An array of shape (256, 4).
+    '''
+
+    stops = sorted(gradient)
+    colors = np.array([ImageColor.getrgb(gradient[stop])[:3]
+                       for stop in stops], dtype=float)
+    levels = np.linspace(0, 1, 256)
+    palette = np.empty((256, 4))
+    for channel in range(3):
+        palette[:, channel] = np.interp(levels, stops, colors[:, channel])
+    palette[:, 3] = np.maximum(levels, min_opacity) * 255
+    return np.round(palette).astype(np.uint8)
+
+
+def _kernel(radius):
+    '''Creates a one dimensional gaussian kernel with a peak of one,
+    whose standard deviation is half the radius. It is cut off at the
+    radius, where it has fallen to exp(-2), or about 0.135.'''
+
+    offsets = np.arange(-radius, radius + 1)
+    return np.exp(-0.5 * (offsets / (radius / 2)) ** 2)
+
+
+def _render_tile(task):
+    '''Renders and saves a single tile.
+
+    Args:
+        task (tuple):
+            The zoom level, x and y of the tile, the pixel coordinates
+            of the points around it, and the rendering options.
+
+    Returns:
+        Whether the tile had any heat and was saved.
+    '''
+
+    zoom, tile_x, tile_y, x, y, options = task
+    directory, radius, saturation, palette = options
+    size = TILE_SIZE + 2 * radius
+
+    # Count the points of each pixel, including those in the margin
+    # around the tile that the kernel reaches in from
+    x = np.floor(x - (tile_x * TILE_SIZE - radius)).astype(np.int64)
+    y = np.floor(y - (tile_y * TILE_SIZE - radius)).astype(np.int64)
+    inside = (x >= 0) & (x < size) & (y >= 0) & (y < size)
+    counts = np.bincount(y[inside] * size + x[inside], minlength=size ** 2)
+    counts = counts.reshape(size, size).astype(float)
+
+    # Blur the rows and then the columns, which crops off the margin
+    kernel = _kernel(radius)
+    density = sliding_window_view(counts, len(kernel), axis=1) @ kernel
+    density = sliding_window_view(density, len(kernel), axis=0) @ kernel
+
+    # Anything weaker than the tail of a single point's kernel is empty
+    visible = density > 1e-3
+    if not visible.any():
+        return False
+    intensity = np.log1p(density) / math.log1p(saturation)
+    levels = np.clip(np.round(intensity * 255), 0, 255).astype(np.uint8)
+    pixels = palette[levels]
+    pixels[~visible] = 0
+
+    folder = os.path.join(directory, str(zoom), str(tile_x))
+    os.makedirs(folder, exist_ok=True)
+    image = Image.fromarray(pixels, 'RGBA')
+    image.save(os.path.join(folder, f'{tile_y}.png'), optimize=False)
+    return True
+
+
+def _iter_tasks(latitudes, longitudes, zoom, options):
+    '''Creates a rendering task for every tile that a point is in, or
+    close enough to for its heat to reach.
+
+    Yields:
+        The arguments of _render_tile for each tile.
+    '''
+
+    directory, radius, _, _ = options
+    x, y = _project(latitudes, longitudes, zoom)
+    tiles = 2 ** zoom
+    columns = np.minimum(x // TILE_SIZE, tiles - 1).astype(np.int64)
+    rows = np.minimum(y // TILE_SIZE, tiles - 1).astype(np.int64)
+
+    # Group the points by the tile that they're in
+    keys = rows * tiles + columns
+    order = np.argsort(keys, kind='stable')
+    keys, x, y = keys[order], x[order], y[order]
+    occupied, starts = np.unique(keys, return_index=True)
+    ends = np.append(starts[1:], len(keys))
+    groups = {key: (start, end)
+              for key, start, end in zip(occupied.tolist(), starts.tolist(),
+                                         ends.tolist())}
+
+    # Tiles next to an occupied tile may also be reached by its points
+    candidates = set()
+    for key in groups:
+        row, column = divmod(key, tiles)
+        for neighbor_row in range(max(row - 1, 0), min(row + 2, tiles)):
+            for neighbor_column in range(column - 1, column + 2):
+                candidates.add((neighbor_row, neighbor_column % tiles))
+
+    for row, column in sorted(candidates):
+        parts = []
+        for neighbor_row in range(max(row - 1, 0), min(row + 2, tiles)):
+            for offset in (-1, 0, 1):
+                neighbor = (column + offset) % tiles
+                group = groups.get(neighbor_row * tiles + neighbor)
+                if group is not None:
+                    # Points on the other side of the antimeridian are
+                    # shifted next to the tile
+                    shift = (column + offset - neighbor) * TILE_SIZE
+                    parts.append((x[group[0]:group[1]] + shift,
+                                  y[group[0]:group[1]]))
+        tile_x = np.concatenate([part[0] for part in parts])
+        tile_y = np.concatenate([part[1] for part in parts])
+        # Only the points within reach of the tile are needed
+        left, top = column * TILE_SIZE - radius, row * TILE_SIZE - radius
+        near = ((tile_x >= left) & (tile_x < left + TILE_SIZE + 2 * radius)
+                & (tile_y >= top) & (tile_y < top + TILE_SIZE + 2 * radius))
+        if near.any():
+            yield zoom, column, row, tile_x[near], tile_y[near], options
+
+
+def _saturation(latitudes, longitudes, zoom, radius):
+    '''Estimates the density at which the heat is at its most intense,
+    which is the largest number of points within a radius-sized square
+    at the zoom level.'''
+
+    x, y = _project(latitudes, longitudes, zoom)
+    keys = (y // radius).astype(np.int64) * 2**32 + (x // radius)
+    _, counts = np.unique(keys.astype(np.int64), return_counts=True)
+    return max(counts.max(), 2)
+
+
+def render_heat_tiles(coordinates, directory, min_zoom=0, max_zoom=12,
+                      radius=12, gradient=None, min_opacity=0.05,
+                      workers=None):
+    '''Renders coordinate data into a directory of heatmap tiles.
+
+    Tiles without any heat are not written. Instead, a single
+    transparent tile is saved to the directory, to be shown in their
+    place. See Map.add_heat_tiles.
+
+    Args:
+        coordinates (list/CoordinateArray):
+            A list of (latitude, longitude) tuples, an array of them, or
+            a CoordinateArray. Missing values are left out.
+        directory (str):
+            The directory to save the tiles in, which is created if it
+            doesn't exist.
+
+    Kwargs:
+        min_zoom (int) --> 0:
+            The lowest zoom level to render tiles for.
+        max_zoom (int) --> 12:
+            The highest zoom level to render tiles for. Each zoom level
+            can have four times as many tiles as the one before it.
+        radius (int) --> 12:
+            The radius in pixels of the heat around each point.
+        gradient (dict) --> None:
+            Color gradient config. A value of None will use
+            DEFAULT_GRADIENT.
+            e.g. {0.4: 'blue', 0.65: 'lime', 1: 'red'}
+        min_opacity (float) --> 0.05:
+            The opacity of the faintest heat.
+        workers (int) --> None:
+            The number of processes to render the tiles with. A value
+            of None or 1 will use the current process only.
+
+    Returns:
+        The number of tiles that were saved.
+    '''
+
+    coordinates = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+    latitudes, longitudes = coordinates[:, 0], coordinates[:, 1]
+    complete = np.isfinite(latitudes) & np.isfinite(longitudes)
+    latitudes, longitudes = latitudes[complete], longitudes[complete]
+    radius = max(int(radius), 1)
+    palette = _palette(gradient or DEFAULT_GRADIENT, min_opacity)
+
+    os.makedirs(directory, exist_ok=True)
+    empty = np.zeros((TILE_SIZE, TILE_SIZE, 4), dtype=np.uint8)
+    Image.fromarray(empty, 'RGBA').save(os.path.join(directory, EMPTY_TILE))
+    if not len(latitudes):
+        return 0
+
+    saved = 0
+    executor = None
+    if workers is not None and workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        for zoom in range(min_zoom, max_zoom + 1):
+            saturation = _saturation(latitudes, longitudes, zoom, radius)
+            options = (directory, radius, saturation, palette)
+            tasks = _iter_tasks(latitudes, longitudes, zoom, options)
+            if executor is None:
+                saved += sum(map(_render_tile, tasks))
+                continue
+            # Hand out the tasks in batches, so that the points of only
+            # a limited number of tiles are waiting to be rendered
+            while True:
+                batch = list(islice(tasks, workers * 64))
+                if not batch:
+                    break
+                saved += sum(executor.map(_render_tile, batch, chunksize=16))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return saved
@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*-
+
+"""
+geophotos.track
+~~~~~~~~~~~~~~~
+
+Shrinks a location history, such as a Google Takeout one, before it is
+geocoded or drawn. Most of the points of a history are redundant: they
+either pile up in one place while its owner stays there, or lie on a
+nearly straight line while they travel. Stays are detected and reduced
+to their arrival and departure, and the rest of the track is simplified
+with the Douglas-Peucker algorithm. Both steps work on whole columns
+at once.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from .coordinates import CoordinateArray
+
+# Mean radius of the earth in meters
+EARTH_RADIUS = 6371008.8
+
+# Default thresholds of simplify_track
+DEFAULT_STAY_DISTANCE = 100.0
+DEFAULT_STAY_DURATION = 300.0
+DEFAULT_TOLERANCE = 20.0
+
+# How much a track was reduced by each step of simplify_track, where the
+# ratio is the number of original points per remaining point
+Reduction = namedtuple('Reduction', ['original', 'stays', 'after_stays',
+                                     'simplified', 'ratio'])
+
+
+def _stay_runs(latitudes, longitudes, timestamps, distance, duration,
+               offset):
+    '''Finds the runs of consecutive points that stay in the same cell
+    of a grid for long enough.
+
+    Args:
+        latitudes (array):
+            The latitude of each point, in chronological order.
+        longitudes (array):
+            The longitude of each point.
+        timestamps (array):
+            The timestamp of each point, in milliseconds.
+        distance (float):
+            The width and height of the cells in meters.
+        duration (float):
+            The shortest time in milliseconds that counts as a stay.
+        offset (float):
+            How far the grid is shifted, as a fraction of a cell.
+
+    Returns:
+        A tuple of the first index of each run and the index after it.
+    '''
+
+    size = distance / EARTH_RADIUS
+    rows = np.floor(np.radians(latitudes) / size + offset)
+    # Every row of cells is scaled by the latitude of its middle, so that
+    # the cells are about as wide as they are tall
+    scales = np.cos((rows - offset + 0.5) * size)
+    columns = np.floor(np.radians(longitudes) * scales / size + offset)
+    changes = (rows[1:] != rows[:-1]) | (columns[1:] != columns[:-1])
+    starts = np.flatnonzero(np.concatenate([[True], changes]))
+    ends = np.append(starts[1:], len(latitudes))
+    long_enough = timestamps[ends - 1] - timestamps[starts] >= duration
+    return starts[long_enough], ends[long_enough]
+
+
+def _split_wide(latitudes, longitudes, timestamps, starts, ends, distance,
+                duration):
+    '''Splits stays wherever they grow wider or taller than a distance,
+    and drops the pieces that aren't long enough to count as stays.
+
+    Args:
+        latitudes (array):
+            The latitude of each point, in chronological order.
+        longitudes (array):
+            The longitude of each point.
+        timestamps (array):
+            The timestamp of each point, in milliseconds.
+        starts (array):
+            The first index of each stay.
+        ends (array):
+            The index after each stay.
+        distance (float):
+            The largest width and height of a stay in meters.
+        duration (float):
+            The shortest time in milliseconds that counts as a stay.
+
+    Returns:
+        A tuple of the first index of each stay and the index after it.
+    '''
+
+    size = distance / EARTH_RADIUS
+    pieces = []
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        # Look a window of points ahead at a time, so that splitting a
+        # long stay into many pieces doesn't go over it again each time
+        window = 64
+        while start < end:
+            stop = min(end, start + window)
+            latitude = np.radians(latitudes[start:stop])
+            longitude = np.radians(longitudes[start:stop])
+            height = (np.maximum.accumulate(latitude)
+                      - np.minimum.accumulate(latitude))
+            width = (np.maximum.accumulate(longitude)
+                     - np.minimum.accumulate(longitude)) * np.cos(latitude[0])
+            too_wide = np.flatnonzero((height > size) | (width > size))
+            if len(too_wide):
+                stop = start + int(too_wide[0])
+            elif stop < end:
+                window *= 2
+                continue
+            if timestamps[stop - 1] - timestamps[start] >= duration:
+                pieces.append((start, stop))
+            start = stop
+    if not pieces:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    starts, ends = np.array(pieces, dtype=np.int64).T
+    return starts, ends
+
+
+def find_stays(coordinates, distance=DEFAULT_STAY_DISTANCE,
+               duration=DEFAULT_STAY_DURATION):
+    '''Finds the stays of a chronologically sorted track, which are the
+    stretches of time during which it doesn't leave a small area.
+
+    A stay is found wherever consecutive points remain in the same grid
+    cell for long enough. Two grids that are shifted by half a cell from
+    each other are used, so that a stay on the edge of a cell of one
+    grid is still found by the other, and the stays of both are joined.
+    Joined stays are split again wherever they grow wider or taller
+    than the distance, so that slow, steady movement doesn't chain
+    into a single long stay.
+
+    Args:
+        coordinates (CoordinateArray):
+            The track, sorted chronologically, without missing values.
+
+    Kwargs:
+        distance (float) --> DEFAULT_STAY_DISTANCE:
+            The width of the area in meters.
+        duration (float) --> DEFAULT_STAY_DURATION:
+            The shortest time in seconds that counts as a stay.
+
+    Returns:
+        A tuple of the first index of each stay and the index after it.
+    '''
+
+    length = len(coordinates)
+    if not length:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    # Count how many runs of either grid cover each point
+    coverage = np.zeros(length + 1, dtype=np.int64)
+    for offset in (0.0, 0.5):
+        starts, ends = _stay_runs(coordinates.latitudes,
+                                  coordinates.longitudes,
+                                  coordinates.timestamps, distance,
+                                  duration * 1000, offset)
+        np.add.at(coverage, starts, 1)
+        np.add.at(coverage, ends, -1)
+    covered = np.cumsum(coverage[:-1]) > 0
+    # The stays are the stretches of covered points
+    edges = np.diff(covered.astype(np.int8), prepend=0, append=0)
+    return _split_wide(coordinates.latitudes, coordinates.longitudes,
+                       coordinates.timestamps, np.flatnonzero(edges == 1),
+                       np.flatnonzero(edges == -1), distance,
+                       duration * 1000)
+
+
+def _segment_distances(latitudes, longitudes, points, starts, ends):
+    '''Measures the distance in meters from points to the line segments
+    between pairs of other points, on a plane that is tangent to the
+    start of each segment.'''
+
+    scales = np.cos(np.radians(latitudes[starts]))
+    # Wrap the differences in longitude, in case of the antimeridian
+    x = (longitudes[points] - longitudes[starts] + 180) % 360 - 180
+    x *= scales
+    y = latitudes[points] - latitudes[starts]
+    end_x = (longitudes[ends] - longitudes[starts] + 180) % 360 - 180
+    end_x *= scales
+    end_y = latitudes[ends] - latitudes[starts]
+
+    # Project each point onto its segment, stopping at the ends
+    lengths = end_x ** 2 + end_y ** 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fractions = np.where(lengths > 0,
+                             (x * end_x + y * end_y) / lengths, 0.0)
+    fractions = np.clip(fractions, 0.0, 1.0)
+    degrees = np.hypot(x - fractions * end_x, y - fractions * end_y)
+    return np.radians(degrees) * EARTH_RADIUS
+
+
+def simplify_path(coordinates, tolerance=DEFAULT_TOLERANCE, keep=None):
+    '''Simplifies a track with the Douglas-Peucker algorithm, removing
+    the points that are within a tolerance of the line between the
+    points kept around them.
+
+    Rather than splitting one stretch of the track at a time, every
+    stretch is split at once on each pass over the points, so that the
+    number of passes only depends on how deeply the track is split.
+
+    Args:
+        coordinates (CoordinateArray):
+            The track, sorted chronologically, without missing values.
+
+    Kwargs:
+        tolerance (float) --> DEFAULT_TOLERANCE:
+            The largest distance in meters that a removed point may be
+            from the simplified track.
+        keep (array) --> None:
+            Indices of the points that must be kept, which the track is
+            split at first.
+
+    Returns:
+        A boolean array of the points that are kept.
+    '''
+
+    latitudes, longitudes = coordinates.latitudes, coordinates.longitudes
+    length = len(coordinates)
+    kept = np.zeros(length, dtype=bool)
+    if not length:
+        return kept
+    kept[[0, length - 1]] = True
+    if keep is not None:
+        kept[keep] = True
+
+    anchors = np.flatnonzero(kept)
+    starts, ends = anchors[:-1], anchors[1:]
+    while True:
+        # Only stretches with points between their ends can be split
+        splittable = ends - starts > 1
+        starts, ends = starts[splittable], ends[splittable]
+        if not len(starts):
+            break
+        counts = ends - starts - 1
+        offsets = np.cumsum(counts) - counts
+        stretches = np.repeat(np.arange(len(starts)), counts)
+        points = (np.arange(counts.sum()) - offsets[stretches]
+                  + starts[stretches] + 1)
+        distances = _segment_distances(latitudes, longitudes, points,
+                                       starts[stretches], ends[stretches])
+
+        # Split each stretch at its farthest point, if that is too far
+        farthest = np.maximum.reduceat(distances, offsets)
+        first = np.flatnonzero(distances == farthest[stretches])
+        _, positions = np.unique(stretches[first], return_index=True)
+        splits = points[first[positions]]
+        too_far = farthest > tolerance
+        kept[splits[too_far]] = True
+        starts = np.concatenate([starts[too_far], splits[too_far]])
+        ends = np.concatenate([splits[too_far], ends[too_far]])
+    return kept
+
+
+def simplify_track(coordinates, stay_distance=DEFAULT_STAY_DISTANCE,
+                   stay_duration=DEFAULT_STAY_DURATION,
+                   tolerance=DEFAULT_TOLERANCE):
+    '''Reduces a location history to the points that are needed to
+    follow it. Each stay is replaced by two points in its middle, at
+    the times of arrival and departure, and the rest of the track is
+    then simplified. See find_stays and simplify_path.
+
+    Args:
+        coordinates (list/CoordinateArray):
+            The location history, as a CoordinateArray with timestamps
+            or as a list of (timestamp, latitude, longitude) tuples,
+            such as the coordinates of a Google Takeout Location
+            History file.
+
+    Kwargs:
+        stay_distance (float) --> DEFAULT_STAY_DISTANCE:
+            The width in meters of the area that a stay doesn't leave.
+        stay_duration (float) --> DEFAULT_STAY_DURATION:
+            The shortest time in seconds that counts as a stay. A value
+            of None will not look for stays.
+        tolerance (float) --> DEFAULT_TOLERANCE:
+            The largest distance in meters that a removed point may be
+            from the simplified track. A value of None will not
+            simplify the track.
+
+    Returns:
+        A tuple of a chronologically sorted CoordinateArray of the
+        remaining points, and a Reduction of how many points were left
+        after each step.
+    '''
+
+    if not isinstance(coordinates, CoordinateArray):
+        coordinates = CoordinateArray.from_records(coordinates)
+    if coordinates.timestamps is None:
+        raise ValueError('A track can only be simplified with timestamps.')
+    original = len(coordinates)
+    # Points without a location or time can't be placed on the track
+    track = coordinates.sort_by_time().dropna().between()
+
+    starts = ends = np.empty(0, dtype=np.int64)
+    if stay_duration is not None and len(track):
+        starts, ends = find_stays(track, distance=stay_distance,
+                                  duration=stay_duration)
+    if len(starts):
+        # Move the arrival and departure of each stay to its middle
+        counts = ends - starts
+        latitudes = track.latitudes.copy()
+        longitudes = track.longitudes.copy()
+        latitudes[starts] = np.add.reduceat(track.latitudes, starts) / counts
+        longitudes[starts] = (np.add.reduceat(track.longitudes, starts)
+                              / counts)
+        latitudes[ends - 1] = latitudes[starts]
+        longitudes[ends - 1] = longitudes[starts]
+        # Drop the points in between
+        inside = np.zeros(len(track) + 1, dtype=np.int64)
+        np.add.at(inside, starts + 1, 1)
+        np.add.at(inside, ends - 1, -1)
+        remaining = np.cumsum(inside[:-1]) <= 0
+        # Find the arrivals and departures among the remaining points
+        positions = np.cumsum(remaining) - 1
+        anchors = np.concatenate([positions[starts], positions[ends - 1]])
+        track = CoordinateArray(latitudes[remaining], longitudes[remaining],
+                                track.timestamps[remaining])
+    else:
+        anchors = None
+    after_stays = len(track)
+
+    if tolerance is not None and len(track):
+        track = track.filter(simplify_path(track, tolerance=tolerance,
+                                           keep=anchors))
+    simplified = len(track)
+    if simplified:
+        ratio = original / simplified
+    else:
+        ratio = float('inf') if original else 1.0
+    return track, Reduction(original, len(starts), after_stays, simplified,
+                            ratio)
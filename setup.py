@@ -20,12 +20,14 @@ setup(
         '': ['*.zip', '*.shp', '*.shx', '*.dbf', '*.prj']
      },
      install_requires=[
+        'numpy',
         'pillow',
         'folium',
         'gdal',
      ],
      extras_require={
         'geopandas': ['geopandas'],
+        'parquet': ['pyarrow'],
      },
      include_package_data=True,
      classifiers=[
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+
+"""Tests of the Analyzer of geophotos.analyze."""
+
+import numpy as np
+import pytest
+
+from geophotos import Analyzer, CoordinateArray
+
+
+@pytest.fixture(autouse=True)
+def hemispheres(monkeypatch):
+    '''Stands in for the world borders with the two hemispheres, so that
+    the tests don't need OGR.'''
+
+    def get_countries(self, data):
+        if not isinstance(data, CoordinateArray):
+            data = CoordinateArray.from_records(data)
+        return ['North' if latitude >= 0 else 'South'
+                for latitude in data.latitudes.tolist()]
+
+    monkeypatch.setattr(Analyzer, '_get_countries', get_countries)
+
+
+@pytest.fixture
+def saved(tmp_path):
+    '''Saves an analysis of three timestamped coordinates.
+
+    Returns:
+        The path of the saved analysis.
+    '''
+
+    timestamps = np.array(['2019-01-01', '2019-02-01', '2019-03-01'],
+                          dtype='datetime64[ms]')
+    data = CoordinateArray([10.0, -20.0, 30.0], [1.0, 2.0, 3.0], timestamps)
+    filepath = str(tmp_path / 'analysis.npz')
+    Analyzer(data).save(filepath)
+    return filepath
+
+
+def test_extend_loaded_with_timestamped_records(saved):
+    analyzer = Analyzer.load(saved)
+    analyzer.extend([(np.datetime64('2019-04-01', 'ms'), -40.0, 4.0)])
+
+    assert isinstance(analyzer.data, CoordinateArray)
+    assert len(analyzer.data) == 4
+    window = analyzer.between('2019-02', '2019-05')
+    assert window.countries == ['South', 'North', 'South']
+    assert window.data.latitudes.tolist() == [-20.0, 30.0, -40.0]
+
+
+def test_extend_loaded_with_untimed_records(saved):
+    analyzer = Analyzer.load(saved)
+    analyzer.extend([(50.0, 5.0)])
+
+    assert isinstance(analyzer.data, CoordinateArray)
+    assert analyzer.countries == ['North', 'South', 'North', 'North']
+    # Data without a timestamp is in no window of time
+    window = analyzer.between('2019-02')
+    assert window.data.latitudes.tolist() == [-20.0, 30.0]
+    assert window.countries == ['South', 'North']
+
+
+def test_grid_file_is_written_at_its_path_and_checked(tmp_path, monkeypatch):
+    pytest.importorskip('osgeo')
+    from geophotos import GridGeolocator, WORLD_BORDERS
+    from geophotos import analyze
+
+    grid_file = str(tmp_path / 'grid.bin')
+    GridGeolocator(WORLD_BORDERS, resolution=5, cache_file=grid_file)
+    assert [path.name for path in tmp_path.iterdir()] == ['grid.bin']
+
+    built = []
+    original = GridGeolocator._build
+
+    def build(self, shape):
+        built.append(shape)
+        return original(self, shape)
+
+    monkeypatch.setattr(GridGeolocator, '_build', build)
+    GridGeolocator(WORLD_BORDERS, resolution=5, cache_file=grid_file)
+    assert not built
+    # A grid of the same shape at another resolution is computed again
+    GridGeolocator(WORLD_BORDERS, resolution=5.01, cache_file=grid_file)
+    assert built == [(36, 72)]
+    # So is a grid of a shapefile that has changed since
+    monkeypatch.setattr(analyze, '_shapefile_source', lambda path: 'other')
+    GridGeolocator(WORLD_BORDERS, resolution=5.01, cache_file=grid_file)
+    assert built == [(36, 72), (36, 72)]
+
+
+def test_extend_loaded_keeps_countries_encoded(saved):
+    analyzer = Analyzer.load(saved)
+    analyzer.extend([(np.datetime64('2019-04-01', 'ms'), -40.0, 4.0)])
+
+    assert analyzer._countries is None
+    assert analyzer._codes.tolist() == [0, 1, 0, 1]
+    assert analyzer.countries == ['North', 'South', 'North', 'South']
+
+
+def test_extend_loaded_with_new_country(saved, monkeypatch):
+    analyzer = Analyzer.load(saved)
+    monkeypatch.setattr(Analyzer, '_get_countries',
+                        lambda self, data: ['Equator', None])
+    analyzer.extend([(0.0, 6.0), (0.0, 7.0)])
+
+    assert analyzer._countries is None
+    extended = saved.replace('analysis', 'extended')
+    analyzer.save(extended)
+    assert (Analyzer.load(extended).countries
+            == ['North', 'South', 'North', 'Equator', None])
+
+
+def test_extend_list_in_place():
+    data = [(10.0, 1.0), (-20.0, 2.0)]
+    analyzer = Analyzer(data)
+    analyzer.extend([(30.0, 3.0)])
+
+    assert analyzer.data is data
+    assert data == [(10.0, 1.0), (-20.0, 2.0), (30.0, 3.0)]
+    assert analyzer.countries == ['North', 'South', 'North']
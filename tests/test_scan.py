@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+"""Tests of the directory scanning of geophotos.scan and GeoPhotos."""
+
+import os
+
+import pytest
+
+from geophotos import GeoPhotos, iter_images
+
+
+@pytest.fixture
+def library(tmp_path):
+    '''Creates a tree of images and other files, including a directory
+    whose name ends in an image extension.
+
+    Returns:
+        A tuple of the root directory and the set of image filepaths.
+    '''
+
+    images = set()
+    for folder in ('', 'a', os.path.join('a', 'b'), 'trip.jpg',
+                   os.path.join('trip.jpg', 'day1.JPEG')):
+        directory = tmp_path / folder
+        directory.mkdir(parents=True, exist_ok=True)
+        for name in ('one.jpg', 'two.HEIC', 'notes.txt'):
+            (directory / name).write_bytes(b'')
+            if not name.endswith('.txt'):
+                images.add(str(directory / name))
+    return str(tmp_path), images
+
+
+@pytest.mark.parametrize('workers', [None, 4])
+def test_iter_images_finds_every_image(library, workers):
+    root, images = library
+    assert set(iter_images(root, workers=workers)) == images
+
+
+def test_directory_named_like_an_image_is_searched(library):
+    root, images = library
+    found = set(iter_images(root))
+    trip = os.path.join(root, 'trip.jpg')
+    assert trip not in found
+    assert os.path.join(trip, 'day1.JPEG', 'one.jpg') in found
+
+
+def test_iter_images_without_recursion(library):
+    root, images = library
+    found = set(iter_images(root, recursive=False))
+    assert found == {path for path in images
+                     if os.path.dirname(path) == root}
+
+
+def test_feed_and_find_accept_directories(library):
+    root, images = library
+    photos = GeoPhotos()
+    photos.feed(root)
+    assert photos.images == images
+    assert set(GeoPhotos().find(root)) == images
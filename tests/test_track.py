@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+"""Tests of the stay detection and simplification of geophotos.track."""
+
+import numpy as np
+
+from geophotos import CoordinateArray, find_stays, simplify_track
+from geophotos.track import EARTH_RADIUS
+
+# Degrees of latitude per meter
+DEGREES = np.degrees(1 / EARTH_RADIUS)
+
+
+def slow_line(speed, seconds, interval=30):
+    '''Creates a track that heads north from (40, -75) at a constant
+    speed, with a point every interval seconds.
+
+    Returns:
+        A CoordinateArray of the track.
+    '''
+
+    times = np.arange(0, seconds, interval)
+    latitudes = 40 + times * speed * DEGREES
+    longitudes = np.full(len(times), -75.0)
+    return CoordinateArray(latitudes, longitudes, times * 1000)
+
+
+def test_slow_line_is_not_one_long_stay():
+    # A little slower than one cell of 100 meters per stay duration
+    track = slow_line(speed=100 / 400, seconds=4 * 3600)
+    starts, ends = find_stays(track, distance=100, duration=300)
+
+    assert len(starts)
+    heights = [np.ptp(track.latitudes[start:end]) / DEGREES
+               for start, end in zip(starts.tolist(), ends.tolist())]
+    assert max(heights) <= 100
+
+
+def test_slow_line_keeps_its_route():
+    track = slow_line(speed=100 / 400, seconds=4 * 3600)
+    simplified, reduction = simplify_track(track, stay_distance=100,
+                                           stay_duration=300)
+
+    assert reduction.simplified < reduction.original
+    # The simplified track still spans the route from end to end
+    length = np.ptp(track.latitudes) / DEGREES
+    assert np.ptp(simplified.latitudes) / DEGREES > length - 200
+
+
+def test_stay_in_place_is_found_once():
+    rng = np.random.default_rng(0)
+    times = np.arange(0, 3600, 30)
+    latitudes = 40 + rng.normal(0, 5 * DEGREES, len(times))
+    longitudes = -75 + rng.normal(0, 5 * DEGREES, len(times))
+    track = CoordinateArray(latitudes, longitudes, times * 1000)
+    starts, ends = find_stays(track, distance=100, duration=300)
+
+    assert starts.tolist() == [0]
+    assert ends.tolist() == [len(track)]